@@ -0,0 +1,248 @@
+"""
+Headless batch pipeline: tailor emails / resumes for many JDs against one portfolio.
+
+Input is a JSONL file, one JD per line:
+    {"id": "job-1", "jd": "We are looking for ..."}
+("jd_text", "body" or "description" are accepted instead of "jd"; a missing
+id falls back to a hash of the JD text.)
+
+Results are streamed to the output JSONL as soon as each JD finishes.
+Re-running with the same output file skips JDs that already succeeded,
+so a crashed run can simply be restarted.
+
+Example:
+    python batch.py jds.jsonl -o results.jsonl --github octocat \
+        --name "Rahul Sharma" --email rahul@example.com --resume --workers 4 --rpm 30
+
+With --async the JDs are multiplexed on one event loop (Chain's a* API) instead of
+a thread pool; --workers then bounds the number of JDs in flight.
+"""
+import os
+import json
+import asyncio
+import hashlib
+import argparse
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, Set
+
+from chain import Chain
+from portfolio import Portfolio, github_fetcher
+from tracing import trace_request
+from utils import RateLimiter, adrive, drive
+
+JD_FIELDS = ("jd", "jd_text", "body", "description")
+
+
+def read_jds(path: str) -> Iterator[Dict]:
+    """Yield {"id", "jd"} records from a JSONL file, skipping blank / JD-less / non-text-JD lines."""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logging.warning(f"Line {line_no}: invalid JSON ({e}), skipped.")
+                continue
+            if not isinstance(record, dict):
+                logging.warning(f"Line {line_no}: not a JSON object, skipped.")
+                continue
+            jd = next((record[k] for k in JD_FIELDS if record.get(k)), "")
+            if not isinstance(jd, str):
+                logging.warning(f"Line {line_no}: JD is a {type(jd).__name__}, not text, skipped.")
+                continue
+            if not jd.strip():
+                logging.warning(f"Line {line_no}: no JD text, skipped.")
+                continue
+            jd_id = record.get("id") or record.get("request_id") \
+                or hashlib.sha1(jd.encode("utf-8")).hexdigest()[:12]
+            yield {"id": str(jd_id), "jd": jd}
+
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids already written successfully to the output file (for resuming)."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partial line from a crash
+            if not record.get("error"):
+                done.add(record.get("id"))
+    return done
+
+
+def _pipeline(chain: Chain, portfolio: Portfolio, item: Dict, args):
+    """
+    extract → match → email / resume for one JD. Yields {name: (object, method, args, kwargs)}
+    steps, answered by `_calls` (sync) or `_acalls` (async: a* methods, run concurrently).
+    """
+    steps = yield {"jobs": (chain, "extract_jobs", (item["jd"],), {})}
+    job_info = steps["jobs"][0]
+
+    skills = job_info.get("skills") or item["jd"]
+    links_flat = (yield {"links": (portfolio, "query_links", (skills,), {})})["links"]
+    if not links_flat:
+        links_flat = portfolio.top_n_fallback(n=3)
+
+    result = {"id": item["id"], "job": job_info, "links": links_flat}
+    outputs = {}
+    if args.email:
+        outputs["email"] = (chain, "write_mail",
+                            (job_info, links_flat, args.name, args.background, args.user_email), {})
+    if args.resume:
+        os.makedirs(args.resume_dir, exist_ok=True)
+        safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in item["id"])
+        outputs["resume"] = (chain, "write_resume",
+                             (job_info, args.name, args.background, args.user_email, links_flat),
+                             {"file_name": os.path.join(args.resume_dir, f"{safe_id}_Resume.docx")})
+    if outputs:
+        result.update((yield outputs))
+    return result
+
+
+def _calls(steps: Dict) -> Dict:
+    return {name: getattr(obj, method)(*a, **kw) for name, (obj, method, a, kw) in steps.items()}
+
+
+async def _acalls(steps: Dict) -> Dict:
+    async def call(obj, method, a, kw):
+        async_method = getattr(obj, f"a{method}", None)
+        if async_method is not None:
+            return await async_method(*a, **kw)
+        # No async API (e.g. the Chroma query + embedding): keep it off the event loop
+        return await asyncio.to_thread(getattr(obj, method), *a, **kw)
+
+    # Steps yielded together (email and resume) only depend on the job: run them concurrently
+    return dict(zip(steps, await asyncio.gather(*(call(*step) for step in steps.values()))))
+
+
+def process_jd(chain: Chain, portfolio: Portfolio, item: Dict, args) -> Dict:
+    """Run one JD through extract → match → email / resume."""
+    with trace_request("batch", jd_id=item["id"]) as trace:
+        result = drive(_pipeline(chain, portfolio, item, args), _calls)
+    if args.trace:
+        result["trace"] = trace.to_dict()
+    return result
+
+
+async def aprocess_jd(chain: Chain, portfolio: Portfolio, item: Dict, args) -> Dict:
+    """Async version of `process_jd`."""
+    with trace_request("batch", jd_id=item["id"]) as trace:
+        result = await adrive(_pipeline(chain, portfolio, item, args), _acalls)
+    if args.trace:
+        result["trace"] = trace.to_dict()
+    return result
+
+
+def build_portfolio(args) -> Portfolio:
+    if args.github:
+        portfolio = Portfolio.from_github(args.github)
+    elif args.portfolio_csv:
+        portfolio = Portfolio(file_path=args.portfolio_csv)
+    else:
+        portfolio = Portfolio()
+    portfolio.load_portfolio()
+    return portfolio
+
+
+def _pending(args):
+    """JDs of the input not yet written successfully to the output file."""
+    done = completed_ids(args.output)
+    todo = [item for item in read_jds(args.input) if item["id"] not in done]
+    logging.info(f"{len(done)} JDs already done, {len(todo)} to process.")
+    return todo
+
+
+def _failed(item: Dict, e: Exception) -> Dict:
+    logging.error(f"JD {item['id']} failed: {e}")
+    return {"id": item["id"], "error": str(e)}
+
+
+def _write(out, record: Dict):
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def run(args):
+    todo = _pending(args)
+    if not todo:
+        return
+
+    chain = Chain(rate_limiter=RateLimiter(args.rpm) if args.rpm else None)
+    portfolio = build_portfolio(args)
+
+    write_lock = threading.Lock()
+    with open(args.output, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(process_jd, chain, portfolio, item, args): item for item in todo}
+        for fut in as_completed(futures):
+            try:
+                record = fut.result()
+            except Exception as e:
+                record = _failed(futures[fut], e)
+            with write_lock:
+                _write(out, record)
+
+
+async def arun(args):
+    """Async version of `run`: one event loop, at most `args.workers` JDs in flight."""
+    todo = _pending(args)
+    if not todo:
+        return
+
+    chain = Chain(rate_limiter=RateLimiter(args.rpm) if args.rpm else None, max_concurrency=args.workers)
+    if args.github:
+        portfolio = await Portfolio.afrom_github(args.github)
+        await github_fetcher().aclose()  # only needed for the fetch: close it on this loop
+        await asyncio.to_thread(portfolio.load_portfolio)
+    else:
+        portfolio = build_portfolio(args)
+
+    sem = asyncio.Semaphore(args.workers)
+
+    async def one(item):
+        async with sem:
+            try:
+                return await aprocess_jd(chain, portfolio, item, args)
+            except Exception as e:
+                return _failed(item, e)
+
+    with open(args.output, "a", encoding="utf-8") as out:
+        for fut in asyncio.as_completed([one(item) for item in todo]):
+            _write(out, await fut)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-generate cold emails / resumes for many JDs.")
+    parser.add_argument("input", help="JSONL file with one JD per line")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="JSONL results file (appended)")
+    parser.add_argument("--github", help="GitHub username to build the portfolio from")
+    parser.add_argument("--portfolio-csv", help="CSV with Title, Techstack, Links columns")
+    parser.add_argument("--name", default="", help="Candidate name")
+    parser.add_argument("--background", default="", help="Short candidate intro")
+    parser.add_argument("--email", dest="user_email", default="", help="Candidate email")
+    parser.add_argument("--no-email", dest="email", action="store_false", help="Skip cold emails")
+    parser.add_argument("--resume", action="store_true", help="Also build a .docx resume per JD")
+    parser.add_argument("--resume-dir", default="resumes", help="Folder for generated resumes")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent JDs")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Multiplex JDs on one event loop instead of threads")
+    parser.add_argument("--trace", action="store_true", help="Include per-stage timings in each result")
+    parser.add_argument("--rpm", type=float, default=30, help="LLM requests per minute (0 = unlimited)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    if args.use_async:
+        asyncio.run(arun(args))
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
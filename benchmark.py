@@ -0,0 +1,323 @@
+"""
+Offline benchmark suite (no Groq, no model downloads).
+
+Swaps ChatGroq for a deterministic FakeLLM (configurable latency / token counts)
+and Chroma's embedding model for a hashing FakeEmbedding, then measures:
+    extract_jobs, write_mail, write_resume (end to end, in memory),
+    load_portfolio (indexing) and query_links on the Chroma and fallback paths
+for synthetic portfolios of the requested sizes.
+
+Reports throughput, p50 / p95 / p99 latency and peak Python memory (tracemalloc)
+and compares p95 against a stored baseline. The retained footprint of a
+--footprint-rows portfolio (default 100k) is reported for the columnar
+ProjectTable vs the previous DataFrame + row-dict representation.
+
+    python benchmark.py                          # compare with bench_baseline.json
+    python benchmark.py --sizes 10,1000,100000   # bigger portfolios
+    python benchmark.py --save-baseline          # record a new baseline
+
+Exits with status 1 when a scenario's p95 regresses beyond --tolerance.
+"""
+import gc
+import sys
+import json
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import tempfile
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from cache import ResponseCache
+from chain import Chain
+from embed_cache import EmbeddingCache
+from portfolio import Portfolio
+from project_table import ProjectTable
+
+LANGUAGES = ["Python", "JavaScript", "TypeScript", "Go", "Rust", "C++", "Java", "Jupyter Notebook"]
+TOPICS = ["nlp", "llm", "computer-vision", "langchain", "streamlit", "fastapi", "react",
+          "recommendation-system", "chromadb", "pytorch", "tensorflow", "docker"]
+WORDS = ["smart", "resume", "vision", "chat", "graph", "stream", "vector", "agent", "pipeline", "tracker"]
+
+SAMPLE_JD = """
+We are looking for an AI Engineer with 0–2 years of experience.
+The ideal candidate should have strong skills in Python, NLP, and Large Language Models (LLMs).
+Hands-on experience with LangChain, Vector Databases (like ChromaDB or FAISS), and Streamlit is preferred.
+Exposure to building recommendation systems or computer vision projects is a plus.
+"""
+
+
+# -------------------------------
+# Fakes
+# -------------------------------
+class FakeLLM(BaseChatModel):
+    """
+    Deterministic stand-in for ChatGroq: answers by prompt type after `latency` seconds,
+    reporting `prompt_tokens` / `completion_tokens` as usage metadata.
+    """
+
+    latency: float = 0.05
+    prompt_tokens: int = 400
+    completion_tokens: int = 150
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-groq"
+
+    def _answer(self, prompt: str) -> str:
+        if "JOB DESCRIPTION TEXT" in prompt:
+            return json.dumps({
+                "role": "AI Engineer", "experience": "0-2 years",
+                "skills": ["Python", "NLP", "LangChain", "ChromaDB", "Streamlit"],
+                "description": "Build LLM applications.",
+            })
+        if "bullet points" in prompt:
+            return "- Built an end-to-end pipeline.\n- Cut latency by 40% with caching."
+        return "Dear Hiring Manager,\n\nI am excited to apply for this role.\n\nBest regards"
+
+    def _usage(self) -> Dict[str, int]:
+        return {"input_tokens": self.prompt_tokens, "output_tokens": self.completion_tokens,
+                "total_tokens": self.prompt_tokens + self.completion_tokens}
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        text = self._answer(messages[-1].content)
+        message = AIMessage(content=text, usage_metadata=self._usage())
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs):
+        text = self._answer(messages[-1].content)
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            time.sleep(self.latency / len(words))
+            last = i == len(words) - 1
+            chunk = AIMessageChunk(content=word + ("" if last else " "),
+                                   usage_metadata=self._usage() if last else None)
+            yield ChatGenerationChunk(message=chunk)
+
+
+class FakeEmbedding:
+    """Chroma embedding function: hashed bag of tokens → normalized float32 vector (no model)."""
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        out = []
+        for text in input:
+            vec = np.zeros(self.dim, dtype=np.float32)
+            for tok in text.lower().split():
+                vec[int(hashlib.md5(tok.encode()).hexdigest(), 16) % self.dim] += 1.0
+            norm = np.linalg.norm(vec)
+            out.append((vec / norm if norm else vec).tolist())
+        return out
+
+
+def synthetic_portfolio(n: int, seed: int = 0) -> List[Dict]:
+    """n fake GitHub-like projects (deterministic for a given seed)."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        name = f"{rng.choice(WORDS)}-{rng.choice(WORDS)}-{i}"
+        stack = [rng.choice(LANGUAGES)] + rng.sample(TOPICS, rng.randint(0, 3))
+        rows.append({"Title": name, "Techstack": ", ".join(stack),
+                     "Links": f"https://github.com/bench/{name}"})
+    return rows
+
+
+# -------------------------------
+# Measurement
+# -------------------------------
+def measure(fn: Callable[[int], Any], iterations: int) -> Dict:
+    """
+    Run fn(i) `iterations` times: latency percentiles (ms) and throughput.
+    Peak memory comes from one extra call under tracemalloc (kept out of the timings).
+    """
+    gc.collect()
+    gc.disable()  # as timeit does: a collection pause would land in one sample's latency
+    try:
+        latencies = []
+        t_start = time.perf_counter()
+        for i in range(iterations):
+            t0 = time.perf_counter()
+            fn(i)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        wall = time.perf_counter() - t_start
+    finally:
+        gc.enable()
+
+    gc.collect()
+    tracemalloc.start()
+    fn(iterations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    lat = np.array(latencies)
+    return {
+        "iterations": iterations,
+        "throughput_per_s": round(iterations / wall, 2) if wall else None,
+        "p50_ms": round(float(np.percentile(lat, 50)), 3),
+        "p95_ms": round(float(np.percentile(lat, 95)), 3),
+        "p99_ms": round(float(np.percentile(lat, 99)), 3),
+        "peak_mem_mb": round(peak / 2**20, 2),
+    }
+
+
+def run_suite(sizes: List[int], iterations: int, latency: float, workdir: str,
+              small_latency: float = None) -> Dict[str, Dict]:
+    results = {}
+    # One fake client per model tier; the small model answers several times faster
+    llms = {"small": FakeLLM(latency=latency / 4 if small_latency is None else small_latency),
+            "large": FakeLLM(latency=latency)}
+    # Fresh cache and a unique JD per iteration: every call is a real (fake) LLM round-trip
+    chain = Chain(cache=ResponseCache(f"{workdir}/llm_cache.sqlite"), llms=llms)
+    job = chain.extract_jobs(SAMPLE_JD)[0]
+    links = [{"name": f"project-{i}", "link": f"https://github.com/bench/project-{i}"} for i in range(3)]
+
+    results["extract_jobs"] = measure(lambda i: chain.extract_jobs(f"{SAMPLE_JD}\n#{i}"), iterations)
+    # JD the local pre-parser cannot handle → full LLM extraction (warmed up once: the parser
+    # imports are lazy and would otherwise land in the p95 of short runs)
+    chain.extract_jobs("Join our cafe team and make great coffee")
+    results["extract_jobs[llm]"] = measure(
+        lambda i: chain.extract_jobs(f"Join our cafe team and make great coffee #{i}"), iterations)
+    results["write_mail"] = measure(
+        lambda i: chain.write_mail(job, links, f"User {i}", "AI/ML student", "user@example.com"), iterations)
+    results["write_resume"] = measure(
+        lambda i: chain.render_resume(job, "User", "AI/ML student", "user@example.com",
+                                      [{"name": f"{p['name']}-{i}", "link": p["link"]} for p in links]),
+        iterations)
+
+    embed = FakeEmbedding()
+    # Shared by every portfolio, as in the app: re-indexing the same rows costs no embedding calls
+    embed_cache = EmbeddingCache(f"{workdir}/embeddings.sqlite")
+    for n in sizes:
+        rows = synthetic_portfolio(n)
+        for path, use_chroma in (("chroma", True), ("fallback", False)):
+            state = {}
+
+            def build(i, path=path, use_chroma=use_chroma):
+                p = Portfolio(data=rows, owner=f"bench-{path}-{n}-{i}", persist_dir=f"{workdir}/vectorstore",
+                              embedding_function=embed, embedding_cache=embed_cache, use_chroma=use_chroma)
+                p.load_portfolio()
+                state["portfolio"] = p
+
+            # Indexing 100k rows through Chroma is slow: index once for large sizes
+            results[f"load_portfolio[{path},n={n}]"] = measure(build, 1 if n >= 10000 else min(iterations, 3))
+            portfolio = state["portfolio"]
+            results[f"query_links[{path},n={n}]"] = measure(
+                lambda i, p=portfolio: p.query_links(job["skills"]), iterations)
+            jd_skills = [random.Random(q).sample(LANGUAGES + TOPICS, 3) for q in range(50)]
+            results[f"query_links_batch[{path},n={n},jds=50]"] = measure(
+                lambda i, p=portfolio: p.query_links_batch(jd_skills), iterations)
+    for tier, stats in chain.model_stats().items():
+        results[f"model_tier[{tier}]"] = stats
+    return results
+
+
+def footprint(n: int) -> Dict[str, Dict]:
+    """Retained memory / build time of n portfolio rows: ProjectTable vs DataFrame + records."""
+    rows = synthetic_portfolio(n)
+    builders = {
+        "dataframe+records": lambda: (lambda df: (df, df.to_dict("records")))(pd.DataFrame(rows)),
+        "project_table": lambda: ProjectTable.from_records(rows),
+    }
+    out = {}
+    for name, build in builders.items():
+        gc.collect()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        kept = build()
+        build_ms = (time.perf_counter() - t0) * 1000
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del kept
+        out[f"footprint[{name},n={n}]"] = {"retained_mb": round(retained / 2**20, 2),
+                                           "build_ms": round(build_ms, 1)}
+    return out
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float,
+            min_delta_ms: float = 1.0) -> List[str]:
+    """
+    Scenarios whose p95 is more than `tolerance` (fraction) slower than the baseline.
+    Slowdowns under `min_delta_ms` are ignored (sub-millisecond timings are mostly noise).
+    """
+    regressions = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if base and "p95_ms" in res and "p95_ms" in base and res["p95_ms"] > base["p95_ms"] * (1 + tolerance) \
+                and res["p95_ms"] - base["p95_ms"] >= min_delta_ms:
+            regressions.append(f"{name}: p95 {res['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline ResuMatch benchmark.")
+    parser.add_argument("--sizes", default="10,1000,10000", help="Portfolio sizes, comma separated")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM latency (seconds)")
+    parser.add_argument("--small-latency", type=float, help="Fake small-tier latency (default: latency / 4)")
+    parser.add_argument("--baseline", default="bench_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed p95 slowdown (0.5 = +50%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore smaller p95 slowdowns")
+    parser.add_argument("--footprint-rows", type=int, default=100_000,
+                        help="Portfolio size for the memory footprint report (0 = skip)")
+    parser.add_argument("--output", help="Also write results as JSON here")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="resumatch-bench-")
+    try:
+        results = run_suite([int(s) for s in args.sizes.split(",")], args.iterations, args.latency, workdir,
+                            small_latency=args.small_latency)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'scenario':<40}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak MB':>10}")
+    tiers = {name: r for name, r in results.items() if name.startswith("model_tier[")}
+    for name, r in results.items():
+        if name not in tiers:
+            print(f"{name:<40}{r['throughput_per_s']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}"
+                  f"{r['p99_ms']:>10}{r['peak_mem_mb']:>10}")
+    print(f"\n{'model tier':<40}{'calls':>10}{'avg ms':>10}{'fallback':>10}{'tokens':>10}{'cost $':>10}")
+    for name, r in tiers.items():
+        print(f"{name:<40}{r['calls']:>10}{r['avg_ms']:>10}{r['fallbacks']:>10}"
+              f"{r['prompt_tokens'] + r['completion_tokens']:>10}{r['cost_usd']:>10}")
+    if args.footprint_rows:
+        sizes = footprint(args.footprint_rows)
+        print(f"\n{'footprint':<40}{'MB':>10}{'build ms':>10}")
+        for name, r in sizes.items():
+            print(f"{name:<40}{r['retained_mb']:>10}{r['build_ms']:>10}")
+        results.update(sizes)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; run with --save-baseline first.")
+        return 0
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    for r in regressions:
+        print("REGRESSION", r)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
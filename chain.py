@@ -1,47 +1,413 @@
 import os
-from typing import List, Dict
+import time
+import asyncio
+import weakref
+import threading
+from io import BytesIO
+from typing import List, Dict, Callable, Iterator, AsyncIterator, NamedTuple, TYPE_CHECKING
 
-import streamlit as st
 from dotenv import load_dotenv
 
-from langchain_groq import ChatGroq
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.exceptions import OutputParserException
+from cache import ResponseCache
+from prompt_budget import DEFAULT_JD_BUDGET, compact_jd
+from routing import FALLBACK_TIER, MODEL_TIERS, TierStats, call_cost, model_tiers, task_tiers
+from jd_parser import JobPosting, REQUIRED_FIELDS, parse_jd, missing_fields, merge
+from utils import RateLimiter, adrive, awith_backoff, batch_with_backoff, drive
+from tracing import stage, record, token_usage
 
-from docx import Document
-from docx.shared import Pt, RGBColor
+if TYPE_CHECKING:
+    from langchain_core.prompts import PromptTemplate
+
+# Heavy dependencies (streamlit, langchain, python-docx) are imported inside the
+# methods that need them, so importing this module stays cheap.
 
 load_dotenv()
 
+MODEL_NAME = MODEL_TIERS[FALLBACK_TIER]  # default large model (see routing.py for the tiers)
+# Output checks that send a small-model answer to the large model
+MIN_MAIL_WORDS = 20
+MAX_BULLET_CHARS = 300
+
+
+
+class _Call(NamedTuple):
+    """One LLM request yielded by a flow (`_extract_flow`, `_mail_flow`, ...); answered by `_run_many`."""
+    prompt: "PromptTemplate"
+    inputs: List[Dict]
+    label: str
+    tier: str = None
+    valid: Callable[[str], bool] = None
+
+
+class _StreamTally:
+    """Text, first-token latency and token usage of a streamed answer, chunk by chunk."""
 
-class Chain:
     def __init__(self):
+        self.parts: List[str] = []
+        self.first_token_ms = None
+        self.prompt_tokens = self.completion_tokens = 0
+        self.t0 = time.perf_counter()
+
+    def add(self, chunk) -> str:
+        usage = token_usage(chunk)
+        self.prompt_tokens += usage[0]
+        self.completion_tokens += usage[1]
+        if chunk.content:
+            if self.first_token_ms is None:
+                self.first_token_ms = round((time.perf_counter() - self.t0) * 1000, 3)
+            self.parts.append(chunk.content)
+        return chunk.content
+
+
+# Styled, empty resume document (built once, cloned per render)
+_resume_template = None
+_resume_template_lock = threading.Lock()
+
+
+def resume_template() -> bytes:
+    """Serialized .docx with the compact resume styles already applied."""
+    global _resume_template
+    with _resume_template_lock:
+        if _resume_template is None:
+            from docx import Document
+            from docx.shared import Pt
+
+            doc = Document()
+
+            # --- Global style ---
+            style = doc.styles['Normal']
+            font = style.font
+            font.size = Pt(10)
+
+            paragraph_format = style.paragraph_format
+            paragraph_format.space_after = Pt(2)
+            paragraph_format.space_before = Pt(0)
+            paragraph_format.line_spacing = Pt(12)
+
+            # --- Heading styles (tight) ---
+            for h in ['Heading 1', 'Heading 2', 'Heading 3']:
+                h_style = doc.styles[h].paragraph_format
+                h_style.space_before = Pt(2)
+                h_style.space_after = Pt(2)
+
+            # --- Bullet style (tight) ---
+            bullet_style = doc.styles['List Bullet'].paragraph_format
+            bullet_style.space_before = Pt(0)
+            bullet_style.space_after = Pt(0)
+
+            buf = BytesIO()
+            doc.save(buf)
+            _resume_template = buf.getvalue()
+    return _resume_template
+
+
+class Chain:
+    def __init__(self, cache: ResponseCache = None, rate_limiter: RateLimiter = None, llm=None,
+                 max_concurrency: int = 8, jd_budget: int = None, models: Dict[str, str] = None,
+                 routes: Dict[str, str] = None, llms: Dict[str, object] = None):
         """
         Initialize Groq LLM safely for Streamlit Cloud.
         Reads from env first, then Streamlit Secrets.
+        Responses are cached on disk (temperature=0 → same prompt, same answer);
+        pass a custom `cache` to change its location / limits.
+        `rate_limiter` (optional) throttles outgoing LLM requests, e.g. to Groq quotas.
+        `llm` (optional) replaces the Groq client with any LangChain chat model (tests / benchmarks).
+        `models` ({tier: model name}) and `routes` ({task: tier}) override the model routing in
+        routing.py; `llms` ({tier: chat model}) injects one client per tier. Output that fails
+        validation on a smaller tier is redone on the large one; see `model_stats()`.
+        `max_concurrency` caps in-flight LLM requests per batch (sync) / per event loop (async).
+        Rate-limit (429) errors are retried with exponential backoff.
+        `jd_budget` is the (estimated) token budget for JD text in prompts; boilerplate is
+        stripped first (default: RESUMATCH_JD_BUDGET or 1200, 0 disables compaction).
+
+        The a* methods (aextract_jobs, awrite_mail, astream_mail, arender_resume, awrite_resume)
+        are the asyncio-native API: one process can multiplex many generations over the
+        LLM client's pooled connections.
         """
-        key = os.getenv("GROQ_API_KEY") or st.secrets.get("GROQ_API_KEY")
-        if not key:
-            # Surface a friendly error in the UI instead of a silent crash
-            st.error("GROQ_API_KEY not found. Add it in Streamlit → Settings → Secrets.")
-            raise RuntimeError("Missing GROQ_API_KEY")
-
-        # Use `model=` (more version-proof than `model_name=`)
-        self.llm = ChatGroq(
-            temperature=0,
-            groq_api_key=key,
-            model="llama-3.3-70b-versatile",
+        self.models = {**model_tiers(), **(models or {})}
+        self.routes = {**task_tiers(), **(routes or {})}
+        llms = dict(llms or {})
+        if llm is not None:
+            for tier in self.models:
+                llms.setdefault(tier, llm)
+        todo = [tier for tier in self.models if tier not in llms]
+        if todo:
+            key = os.getenv("GROQ_API_KEY")
+            if not key:
+                import streamlit as st
+                try:
+                    key = st.secrets.get("GROQ_API_KEY")
+                except Exception:  # no secrets.toml (batch / service mode)
+                    key = None
+            if not key:
+                # Surface a friendly error in the UI instead of a silent crash
+                st.error("GROQ_API_KEY not found. Add it in Streamlit → Settings → Secrets.")
+                raise RuntimeError("Missing GROQ_API_KEY")
+
+            # Use `model=` (more version-proof than `model_name=`)
+            from langchain_groq import ChatGroq
+            for tier in todo:
+                llms[tier] = ChatGroq(
+                    temperature=0,
+                    groq_api_key=key,
+                    model=self.models[tier],
+                )
+        self.llms = llms
+        self.llm = llms[FALLBACK_TIER]
+        self.model_name = self.models[FALLBACK_TIER]
+        self.tier_stats = TierStats()
+        self.cache = cache if cache is not None else ResponseCache(
+            os.getenv("RESUMATCH_CACHE_PATH", ".cache/llm_cache.sqlite")
         )
+        self.rate_limiter = rate_limiter
+        self.max_concurrency = max_concurrency
+        if jd_budget is None:
+            jd_budget = int(os.getenv("RESUMATCH_JD_BUDGET", DEFAULT_JD_BUDGET))
+        self.jd_budget = jd_budget
+        self._semaphores = weakref.WeakKeyDictionary()  # event loop → asyncio.Semaphore
 
     # -------------------------------
-    # JD → structured JSON extractor
+    # Model routing
+    # -------------------------------
+    def _tier(self, label: str) -> str:
+        """Tier routed for `label`; the fallback tier if it has no client or no model name."""
+        tier = self.routes.get(label, FALLBACK_TIER)
+        return tier if tier in self.llms and tier in self.models else FALLBACK_TIER
+
+    def _can_fall_back(self, tier: str) -> bool:
+        """A different (larger) client is available to redo `tier`'s output."""
+        return self.llms[tier] is not self.llms[FALLBACK_TIER]
+
+    def _fall_back(self, label: str, tier: str, count: int = 1) -> str:
+        """Count / trace outputs of `tier` that failed validation; returns the tier to redo them on."""
+        self.tier_stats.add(tier, fallbacks=count)
+        record("model_fallback", 0.0, task=label, tier=tier, to=FALLBACK_TIER, count=count)
+        return FALLBACK_TIER
+
+    def _invalid(self, label: str, results: List[str], valid) -> List[int]:
+        """Indexes of `results` (from `label`'s tier) to redo on the large tier."""
+        tier = self._tier(label)
+        if not self._can_fall_back(tier):
+            return []
+        bad = [i for i, content in enumerate(results) if not valid(content)]
+        if bad:
+            self._fall_back(label, tier, len(bad))
+        return bad
+
+    def _track(self, tier: str, ms: float, prompt_tokens: int, completion_tokens: int) -> Dict:
+        """Add one LLM call to the tier stats; returns the trace fields for it."""
+        model = self.models[tier]
+        cost = call_cost(model, prompt_tokens, completion_tokens)
+        self.tier_stats.add(tier, calls=1, ms=ms, prompt_tokens=prompt_tokens,
+                            completion_tokens=completion_tokens, cost_usd=cost)
+        return {"model": model, "tier": tier, "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens, "cost_usd": round(cost, 6)}
+
+    def model_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-tier LLM calls, cache hits, fallbacks, latency (total / avg ms), tokens and cost."""
+        stats = self.tier_stats.snapshot()
+        for tier, s in stats.items():
+            s["model"] = self.models.get(tier)
+        return stats
+
+    # -------------------------------
+    # Cached LLM calls
     # -------------------------------
-    def extract_jobs(self, jd_text: str):
+    def _drive(self, flow):
+        """Run a flow's LLM calls (`_Call`s) with the sync client; returns the flow's result."""
+        return drive(flow, lambda call: self._run_many(*call))
+
+    async def _adrive(self, flow):
+        """Async version of `_drive`: the same flow, its calls awaited on the async client."""
+        return await adrive(flow, lambda call: self._arun_many(*call))
+
+    def _cached(self, prompt: "PromptTemplate", inputs_list: List[Dict], label: str, tier: str,
+                valid: Callable[[str], bool] = None):
+        """Cache keys of `tier` and its usable cached answers (None = miss); hits are counted / traced."""
+        t0 = time.perf_counter()
+        model = self.models[tier]
+        keys = [self.cache.make_key(model, prompt.template, inp) for inp in inputs_list]
+        out = [self.cache.get(k) for k in keys]
+        if valid is not None:
+            out = [v if v is None or valid(v) else None for v in out]
+        lookup_ms = (time.perf_counter() - t0) * 1000
+        hits = sum(v is not None for v in out)
+        for _ in range(hits):
+            record(label, lookup_ms, cache_hit=True, tier=tier)
+        if hits:
+            self.tier_stats.add(tier, cache_hits=hits)
+        return keys, out
+
+    def _cache_lookup(self, prompt: "PromptTemplate", inputs_list: List[Dict], label: str, tier: str,
+                      valid: Callable[[str], bool] = None):
+        """Cache keys, cached answers (None = miss) and the indexes still to generate."""
+        keys, out = self._cached(prompt, inputs_list, label, tier, valid)
+        misses = [i for i, v in enumerate(out) if v is None]
+        if misses and valid is not None and tier != FALLBACK_TIER and self._can_fall_back(tier):
+            # Invalid small-tier answers are not cached, but the large-tier redo is: an input that
+            # fell back before is answered from there instead of paying for the small model again
+            _, redone = self._cached(prompt, [inputs_list[i] for i in misses], label, FALLBACK_TIER, valid)
+            for i, content in zip(misses, redone):
+                out[i] = content
+        return keys, out, [i for i, v in enumerate(out) if v is None]
+
+    def _cache_store(self, keys: List[str], out: List, todo: List[int], results, label: str, ms: float,
+                     tier: str, valid: Callable[[str], bool] = None):
+        """Fill `out` with fresh LLM results, cache (the valid ones) and trace them."""
+        for i, res in zip(todo, results):
+            out[i] = res.content
+            if valid is None or valid(res.content):
+                self.cache.set(keys[i], res.content)
+            record(label, ms, cache_hit=False, **self._track(tier, ms, *token_usage(res)))
+
+    def _run_many(self, prompt: "PromptTemplate", inputs_list: List[Dict], label: str = "llm",
+                  tier: str = None, valid: Callable[[str], bool] = None) -> List[str]:
         """
-        Extract structured job info (role, experience, skills, description) from raw JD text.
-        Returns a list of dicts.
+        Invoke `prompt | <llm of the task's tier>` for every input: cached inputs are answered
+        from disk, the misses go to the LLM concurrently in one `batch` call.
+        Each input is traced as one `label` stage (concurrent calls share the batch wall time).
+        `tier` overrides the task's routed tier. With `valid`, only answers passing it are cached
+        (and cached ones failing it are ignored), so a bad answer is not replayed on every retry.
+        """
+        tier = tier or self._tier(label)
+        keys, out, todo = self._cache_lookup(prompt, inputs_list, label, tier, valid)
+        if todo:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(len(todo))
+            t0 = time.perf_counter()
+            chain = prompt | self.llms[tier]
+            # Only the calls that hit a rate limit are re-sent, not the whole batch
+            results = batch_with_backoff(
+                lambda items: chain.batch(items, config={"max_concurrency": min(len(items), self.max_concurrency)},
+                                          return_exceptions=True),
+                [inputs_list[i] for i in todo],
+            )
+            self._cache_store(keys, out, todo, results, label, (time.perf_counter() - t0) * 1000, tier, valid)
+        return out
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Per-event-loop cap on in-flight async LLM requests."""
+        loop = asyncio.get_running_loop()
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return sem
+
+    async def _arun_many(self, prompt: "PromptTemplate", inputs_list: List[Dict], label: str = "llm",
+                         tier: str = None, valid: Callable[[str], bool] = None) -> List[str]:
+        """Async version of `_run_many`: misses are awaited concurrently, each with 429 backoff."""
+        tier = tier or self._tier(label)
+        keys, out, todo = self._cache_lookup(prompt, inputs_list, label, tier, valid)
+        if todo:
+            chain = prompt | self.llms[tier]
+            sem = self._semaphore()
+
+            async def call(inputs):
+                async with sem:
+                    if self.rate_limiter is not None:
+                        await self.rate_limiter.aacquire()
+                    return await awith_backoff(lambda: chain.ainvoke(inputs))
+
+            t0 = time.perf_counter()
+            results = await asyncio.gather(*(call(inputs_list[i]) for i in todo))
+            self._cache_store(keys, out, todo, results, label, (time.perf_counter() - t0) * 1000, tier, valid)
+        return out
+
+    def _stream_cached(self, prompt: "PromptTemplate", inputs: Dict, tier: str, valid, rec):
+        """(cache key, usable cached answer or None) for a streamed call; a hit is counted / traced."""
+        key = self.cache.make_key(self.models[tier], prompt.template, inputs)
+        cached = self.cache.get(key)
+        if cached is None or (valid is not None and not valid(cached)):
+            return key, None
+        self.tier_stats.add(tier, cache_hits=1)
+        if rec is not None:
+            rec.update(cache_hit=True, tier=tier)
+        return key, cached
+
+    def _stream_done(self, key: str, tally: _StreamTally, tier: str, valid, rec):
+        """Cache (if valid), count and trace a finished stream."""
+        content = "".join(tally.parts)
+        if valid is None or valid(content):
+            self.cache.set(key, content)
+        fields = self._track(tier, (time.perf_counter() - tally.t0) * 1000, tally.prompt_tokens,
+                             tally.completion_tokens)
+        if rec is not None:
+            rec.update(cache_hit=False, first_token_ms=tally.first_token_ms, **fields)
+
+    def _stream(self, prompt: "PromptTemplate", inputs: Dict, label: str = "llm",
+                valid: Callable[[str], bool] = None) -> Iterator[str]:
+        """
+        Streaming version of `_run_many` for one input: yields text chunks as the LLM produces them.
+        A cached answer is yielded in one piece; a finished stream is cached (if it passes `valid`).
         """
+        tier = self._tier(label)
+        with stage(label) as rec:
+            key, cached = self._stream_cached(prompt, inputs, tier, valid, rec)
+            if cached is not None:
+                yield cached
+                return
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            tally = _StreamTally()
+            for chunk in (prompt | self.llms[tier]).stream(inputs):
+                if tally.add(chunk):
+                    yield chunk.content
+            self._stream_done(key, tally, tier, valid, rec)
+
+    async def _astream(self, prompt: "PromptTemplate", inputs: Dict, label: str = "llm",
+                       valid: Callable[[str], bool] = None) -> AsyncIterator[str]:
+        """Async version of `_stream`."""
+        tier = self._tier(label)
+        with stage(label) as rec:
+            key, cached = self._stream_cached(prompt, inputs, tier, valid, rec)
+            if cached is not None:
+                yield cached
+                return
+            async with self._semaphore():
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.aacquire()
+                tally = _StreamTally()
+                async for chunk in (prompt | self.llms[tier]).astream(inputs):
+                    if tally.add(chunk):
+                        yield chunk.content
+            self._stream_done(key, tally, tier, valid, rec)
+
+    def _compact(self, text: str, label: str) -> str:
+        """JD text cut down to `jd_budget` tokens; tokens saved are traced as `compact_prompt`."""
+        if not self.jd_budget:
+            return text
+        with stage("compact_prompt", prompt=label) as rec:
+            compacted = compact_jd(text, self.jd_budget)
+            if rec is not None:
+                rec.update(tokens_before=compacted.tokens_before, tokens_after=compacted.tokens_after,
+                           tokens_saved=compacted.saved)
+        return compacted.text
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit / miss counters and current size of the response cache."""
+        return self.cache.stats()
+
+    # -------------------------------
+    # JD → structured JSON extractor
+    # -------------------------------
+    def _extract_local(self, jd_text: str):
+        """Local pre-parse; returns (local result, fields to ask the LLM for — empty if none)."""
+        with stage("extract_local") as rec:
+            local = parse_jd(jd_text)
+            missing = missing_fields(local)
+            if rec is not None:
+                rec["missing"] = missing
+        if not missing:
+            return local, []
+        # Nothing usable locally → let the LLM extract everything, else only the gaps
+        if len(missing) == len(REQUIRED_FIELDS):
+            return local, ["role", "experience", "skills", "description"]
+        return local, missing
+
+    def _extract_prompts(self):
+        """(extraction prompt, repair prompt) for the LLM tier of extract_jobs."""
+        from langchain_core.prompts import PromptTemplate
+
         prompt_extract = PromptTemplate.from_template(
             """
             ### JOB DESCRIPTION TEXT:
@@ -49,35 +415,126 @@ class Chain:
 
             ### INSTRUCTION:
             Extract the job posting and return as JSON with keys:
-            - role
-            - experience
-            - skills
-            - description
+            {keys}
 
             Only return valid JSON, no extra text.
             """
         )
-        chain_extract = prompt_extract | self.llm
-        res = chain_extract.invoke(input={"page_data": jd_text})
+        prompt_repair = PromptTemplate.from_template(
+            """
+            ### INVALID OUTPUT:
+            {output}
+
+            ### ERROR:
+            {error}
+
+            ### INSTRUCTION:
+            Fix the output above so it is a single valid JSON object with keys:
+            {keys}
+            ("skills" must be a list of strings.)
 
-        try:
-            json_parser = JsonOutputParser()
-            parsed = json_parser.parse(res.content)
-        except OutputParserException:
-            raise OutputParserException("Unable to parse JD into JSON.")
+            Only return valid JSON, no extra text.
+            """
+        )
+        return prompt_extract, prompt_repair
+
+    def _parse_extracted(self, content: str, local: Dict, fields: List[str]) -> List[Dict]:
+        """Parse + validate LLM output merged over the local result (ValueError / OutputParserException)."""
+        from langchain_core.output_parsers import JsonOutputParser
+
+        parsed = JsonOutputParser().parse(content)
+        candidates = parsed if isinstance(parsed, list) else [parsed]
+        jobs = [JobPosting.validate(merge(local, c, fields)).to_dict() for c in candidates]
+        if not jobs:
+            raise ValueError("no job posting in output")
+        return jobs
+
+    def _extraction_check(self, local: Dict, fields: List[str]) -> Callable[[str], bool]:
+        """Cache filter for extraction / repair answers: only output that validates is kept."""
+        from langchain_core.exceptions import OutputParserException
+
+        def valid(content: str) -> bool:
+            try:
+                self._parse_extracted(content, local, fields)
+                return True
+            except (OutputParserException, ValueError):
+                return False
+        return valid
+
+    def _extract_flow(self, jd_text: str, max_repairs: int):
+        """
+        extract_jobs / aextract_jobs: local parse, then the LLM for the missing fields
+        (small tier → large tier → repair round-trips). Yields `_Call`s.
+        """
+        from langchain_core.exceptions import OutputParserException
+
+        local, fields = self._extract_local(jd_text)
+        if not fields:
+            return [JobPosting.validate(local).to_dict()]
+
+        keys = "\n".join(f"- {f}" for f in fields)
+        prompt_extract, prompt_repair = self._extract_prompts()
+        inputs = {"page_data": self._compact(jd_text, "extract_jobs"), "keys": keys}
+        tier = self._tier("extract_jobs")
+        valid = self._extraction_check(local, fields)
+        content, = yield _Call(prompt_extract, [inputs], "extract_jobs", valid=valid)
+        repairs = 0
+        while True:
+            try:
+                return self._parse_extracted(content, local, fields)
+            except (OutputParserException, ValueError) as e:
+                if tier != FALLBACK_TIER and self._can_fall_back(tier):
+                    # Small-model output didn't validate: redo the extraction on the large model
+                    tier = self._fall_back("extract_jobs", tier)
+                    content, = yield _Call(prompt_extract, [inputs], "extract_jobs", tier, valid)
+                elif repairs < max_repairs:
+                    repairs += 1
+                    repair = {"output": content, "error": str(e), "keys": keys}
+                    content, = yield _Call(prompt_repair, [repair], "extract_repair", valid=valid)
+                else:
+                    break
+        raise OutputParserException("Unable to parse JD into JSON.")
+
+    def extract_jobs(self, jd_text: str, max_repairs: int = 1):
+        """
+        Extract structured job info (role, experience, skills, description) from raw JD text.
+        A local regex / skills-dictionary pass runs first; the LLM is only asked for the
+        fields it could not find. LLM output is validated against `JobPosting`; if the small
+        model's output fails it is redone on the large one, then up to `max_repairs` repair
+        round-trips before giving up.
+        Returns a list of dicts.
+        """
+        return self._drive(self._extract_flow(jd_text, max_repairs))
 
-        return parsed if isinstance(parsed, list) else [parsed]
+    async def aextract_jobs(self, jd_text: str, max_repairs: int = 1):
+        """Async version of `extract_jobs`."""
+        return await self._adrive(self._extract_flow(jd_text, max_repairs))
 
     # -------------------------------
     # Recruiter email generator
     # -------------------------------
-    def write_mail(self, job, links_flat: List[Dict], user_name, user_background, user_email):
-        """
-        Generate a personalized cold email for the given job + portfolio links + user info.
-        """
+    def _job_brief(self, job) -> str:
+        """The parsed job as short labelled lines (instead of the repr of the whole dict)."""
+        if not isinstance(job, dict):
+            return self._compact(str(job), "write_mail")
+        skills = job.get("skills") or []
+        lines = [
+            f"Role: {job.get('role') or ''}",
+            f"Experience: {job.get('experience') or ''}",
+            f"Skills: {', '.join(skills) if isinstance(skills, list) else skills}",
+            f"Description: {job.get('description') or ''}",
+        ]
+        brief = "\n".join(line for line in lines if not line.endswith(": "))
+        # Saved tokens are measured against the brief itself, i.e. the prompt sent without compaction
+        return self._compact(brief, "write_mail")
+
+    def _mail_prompt(self, job, links_flat: List[Dict], user_name, user_background, user_email):
+        """Email prompt + its inputs (shared by write_mail / stream_mail)."""
         # Turn links list into a readable inline string
         link_list = ", ".join([p.get("link", "") for p in links_flat if p.get("link")])
 
+        from langchain_core.prompts import PromptTemplate
+
         prompt_email = PromptTemplate.from_template(
             """
             ### JOB DESCRIPTION:
@@ -98,56 +555,189 @@ class Chain:
             - Return only the email body.
             """
         )
-        chain_email = prompt_email | self.llm
-        res = chain_email.invoke({
-            "job_description": str(job),
+        return prompt_email, {
+            "job_description": self._job_brief(job),
             "link_list": link_list,
             "user_name": user_name,
             "user_background": user_background,
             "user_email": user_email
-        })
-        return res.content
+        }
+
+    @staticmethod
+    def _valid_mail(content: str) -> bool:
+        """An email body, not an empty / truncated answer."""
+        return len((content or "").split()) >= MIN_MAIL_WORDS
+
+    def _mail_flow(self, prompt_email: "PromptTemplate", inputs: Dict):
+        """write_mail / awrite_mail: routed tier, redone on the large one if too short. Yields `_Call`s."""
+        content, = yield _Call(prompt_email, [inputs], "write_mail", valid=self._valid_mail)
+        if self._invalid("write_mail", [content], self._valid_mail):
+            content, = yield _Call(prompt_email, [inputs], "write_mail", FALLBACK_TIER, self._valid_mail)
+        return content
+
+    def write_mail(self, job, links_flat: List[Dict], user_name, user_background, user_email):
+        """
+        Generate a personalized cold email for the given job + portfolio links + user info.
+        """
+        prompt_email, inputs = self._mail_prompt(job, links_flat, user_name, user_background, user_email)
+        return self._drive(self._mail_flow(prompt_email, inputs))
+
+    def stream_mail(self, job, links_flat: List[Dict], user_name, user_background, user_email) -> Iterator[str]:
+        """
+        Same as `write_mail`, but yields the email token by token as it is generated.
+        "".join(...) of the chunks is the full email (no fallback: chunks are already shown).
+        """
+        prompt_email, inputs = self._mail_prompt(job, links_flat, user_name, user_background, user_email)
+        yield from self._stream(prompt_email, inputs, label="write_mail", valid=self._valid_mail)
+
+    async def awrite_mail(self, job, links_flat: List[Dict], user_name, user_background, user_email):
+        """Async version of `write_mail`."""
+        prompt_email, inputs = self._mail_prompt(job, links_flat, user_name, user_background, user_email)
+        return await self._adrive(self._mail_flow(prompt_email, inputs))
+
+    async def astream_mail(self, job, links_flat: List[Dict], user_name, user_background,
+                           user_email) -> AsyncIterator[str]:
+        """Async version of `stream_mail`."""
+        prompt_email, inputs = self._mail_prompt(job, links_flat, user_name, user_background, user_email)
+        async for chunk in self._astream(prompt_email, inputs, label="write_mail", valid=self._valid_mail):
+            yield chunk
 
     # -------------------------------
     # Resume (.docx) generator
     # -------------------------------
     def _add_divider(self, doc):
         """Add a thin blue divider line between sections (minimal spacing)."""
+        from docx.shared import Pt, RGBColor
+
         p = doc.add_paragraph("──────────────────────────────────────────────")
         run = p.runs[0]
         run.font.color.rgb = RGBColor(0, 112, 192)
         p.paragraph_format.space_before = Pt(2)
         p.paragraph_format.space_after = Pt(2)
 
-    def write_resume(self, job, user_name, user_background, user_email, projects: List[Dict]):
+    def _bullet_prompt(self, projects: List[Dict]):
+        """Bullet prompt + one input per project."""
+        from langchain_core.prompts import PromptTemplate
+
+        prompt_bullets = PromptTemplate.from_template(
+            """
+            Write exactly 2 concise bullet points (no preamble, no numbering)
+            describing the project '{project_name}'. If helpful, use context: {project_link}.
+            Keep each bullet short, impactful, and ATS-friendly.
+            """
+        )
+        inputs = [
+            {
+                "project_name": p.get("name") or "Untitled Project",
+                "project_link": p.get("link") or "",
+            }
+            for p in projects
+        ]
+        return prompt_bullets, inputs
+
+    @staticmethod
+    def _bullet_lines(content: str) -> List[str]:
+        return [b.strip("•- ") for b in content.split("\n") if b.strip()]
+
+    @classmethod
+    def _valid_bullets(cls, content: str) -> bool:
+        """Two short bullets, without a preamble ("Here are ...:")."""
+        bullets = cls._bullet_lines(content or "")
+        return len(bullets) >= 2 and not bullets[0].endswith(":") \
+            and all(len(b) <= MAX_BULLET_CHARS for b in bullets[:2])
+
+    @classmethod
+    def _clean_bullets(cls, results: List[str]) -> List[List[str]]:
+        """Exactly 2 bullets per LLM answer, padded with generic ones if needed."""
+        out = []
+        for content in results:
+            bullets = cls._bullet_lines(content)
+            if len(bullets) < 2:
+                bullets += [
+                    "Built and deployed clean, modular components end-to-end.",
+                    "Improved performance and reliability through measurement and iteration."
+                ][:2 - len(bullets)]
+            out.append(bullets[:2])
+        return out
+
+    def _bullets_flow(self, projects: List[Dict]):
+        """_project_bullets / _aproject_bullets: routed tier, invalid answers redone on the large one."""
+        prompt_bullets, inputs = self._bullet_prompt(projects)
+        results = yield _Call(prompt_bullets, inputs, "project_bullets", valid=self._valid_bullets)
+        bad = self._invalid("project_bullets", results, self._valid_bullets)
+        if bad:
+            redo = yield _Call(prompt_bullets, [inputs[i] for i in bad], "project_bullets", FALLBACK_TIER,
+                               self._valid_bullets)
+            for i, content in zip(bad, redo):
+                results[i] = content
+        return self._clean_bullets(results)
+
+    def _project_bullets(self, projects: List[Dict]) -> List[List[str]]:
+        """
+        Generate exactly 2 bullets per project with the LLM (short & ATS-friendly).
+        Uncached projects are sent in one `batch`, which LangChain runs concurrently,
+        so latency is bounded by the slowest call instead of their sum.
+        """
+        return self._drive(self._bullets_flow(projects))
+
+    async def _aproject_bullets(self, projects: List[Dict]) -> List[List[str]]:
+        """Async version of `_project_bullets`."""
+        return await self._adrive(self._bullets_flow(projects))
+
+    @staticmethod
+    def resume_file_name(user_name) -> str:
+        """Download / default file name for a user's resume."""
+        return f"{(user_name or 'Candidate').replace(' ', '_')}_Resume.docx"
+
+    def write_resume(self, job, user_name, user_background, user_email, projects: List[Dict],
+                     file_name: str = None):
+        """
+        Generate the resume (see `render_resume`) and save it to disk.
+        file_name: output path (defaults to "<name>_Resume.docx" in the working dir)
+        Returns the file name.
+        """
+        file_name = file_name or self.resume_file_name(user_name)
+        with open(file_name, "wb") as f:
+            f.write(self.render_resume(job, user_name, user_background, user_email, projects))
+        return file_name
+
+    def render_resume(self, job, user_name, user_background, user_email, projects: List[Dict]) -> bytes:
         """
         Generate a one-page Resume in Word (.docx) format with:
         Summary → Education → Technical Skills → Soft Skills → Projects → Achievements
+        Rendered in memory from the prebuilt template; returns the .docx bytes.
 
         projects: flat list like [{"name": "...", "link": "https://..."}, ...]
         """
-        doc = Document()
-
-        # --- Global style ---
-        style = doc.styles['Normal']
-        font = style.font
-        font.size = Pt(10)
-
-        paragraph_format = style.paragraph_format
-        paragraph_format.space_after = Pt(2)
-        paragraph_format.space_before = Pt(0)
-        paragraph_format.line_spacing = Pt(12)
+        selected = (projects or [])[:3]  # limit to 2–3 projects
+        bullets = self._project_bullets(selected) if selected else []
+        return self._build_docx(user_name, user_background, user_email, selected, bullets)
+
+    async def arender_resume(self, job, user_name, user_background, user_email, projects: List[Dict]) -> bytes:
+        """Async version of `render_resume` (docx building runs in a worker thread)."""
+        selected = (projects or [])[:3]
+        bullets = await self._aproject_bullets(selected) if selected else []
+        return await asyncio.to_thread(self._build_docx, user_name, user_background, user_email, selected, bullets)
+
+    async def awrite_resume(self, job, user_name, user_background, user_email, projects: List[Dict],
+                            file_name: str = None):
+        """Async version of `write_resume`."""
+        file_name = file_name or self.resume_file_name(user_name)
+        data = await self.arender_resume(job, user_name, user_background, user_email, projects)
+
+        def save():
+            with open(file_name, "wb") as f:
+                f.write(data)
+
+        await asyncio.to_thread(save)
+        return file_name
 
-        # --- Heading styles (tight) ---
-        for h in ['Heading 1', 'Heading 2', 'Heading 3']:
-            h_style = doc.styles[h].paragraph_format
-            h_style.space_before = Pt(2)
-            h_style.space_after = Pt(2)
+    def _build_docx(self, user_name, user_background, user_email, projects: List[Dict],
+                    all_bullets: List[List[str]]) -> bytes:
+        """Lay out the resume document; `all_bullets` holds the 2 bullets of each project."""
+        from docx import Document
 
-        # --- Bullet style (tight) ---
-        bullet_style = doc.styles['List Bullet'].paragraph_format
-        bullet_style.space_before = Pt(0)
-        bullet_style.space_after = Pt(0)
+        doc = Document(BytesIO(resume_template()))
 
         # --- Header ---
         doc.add_heading(user_name or "Candidate", 0)
@@ -189,29 +779,12 @@ class Chain:
         if not projects:
             doc.add_paragraph("No matching projects found. Add portfolio links or GitHub username.")
         else:
-            for project in projects[:3]:  # limit to 2–3 projects
+            for project, bullets in zip(projects, all_bullets):
                 project_name = project.get("name") or "Untitled Project"
                 project_link = project.get("link") or ""
 
                 doc.add_paragraph(f"{project_name} ({project_link})", style="Heading 3")
-
-                # Generate exactly 2 bullets with LLM (short & ATS-friendly)
-                desc_prompt = f"""
-                Write exactly 2 concise bullet points (no preamble, no numbering)
-                describing the project '{project_name}'. If helpful, use context: {project_link}.
-                Keep each bullet short, impactful, and ATS-friendly.
-                """
-                desc_chain = PromptTemplate.from_template(desc_prompt) | self.llm
-                desc_res = desc_chain.invoke({})
-                bullets = [b.strip("•- ") for b in desc_res.content.split("\n") if b.strip()]
-
-                if len(bullets) < 2:
-                    bullets += [
-                        "Built and deployed clean, modular components end-to-end.",
-                        "Improved performance and reliability through measurement and iteration."
-                    ][:2 - len(bullets)]
-
-                for b in bullets[:2]:
+                for b in bullets:
                     doc.add_paragraph(b, style="List Bullet")
 
         self._add_divider(doc)
@@ -225,7 +798,7 @@ class Chain:
             "• Contributed to multiple open-source projects on GitHub."
         )
 
-        # Save File
-        file_name = f"{(user_name or 'Candidate').replace(' ', '_')}_Resume.docx"
-        doc.save(file_name)
-        return file_name
+        with stage("save_docx"):
+            buf = BytesIO()
+            doc.save(buf)
+        return buf.getvalue()
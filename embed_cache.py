@@ -0,0 +1,125 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# sqlite's default limit on bound parameters is 999
+_SQL_CHUNK = 500
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache (sqlite, float32 blobs).
+    Keyed by a hash of model id + text only, so the same techstack string or JD
+    is embedded once and reused across collections, users and reruns.
+    The least recently used vectors are evicted past `max_entries`.
+    """
+
+    def __init__(self, path: str = ".cache/embeddings.sqlite", max_entries: int = 100_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # One shared connection; access is serialized by self._lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vec BLOB NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_emb_accessed ON embeddings(accessed)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_id: str, text: str) -> str:
+        return hashlib.sha256(f"{model_id}\x1f{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Cached vectors for the keys that are present (misses are simply absent)."""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), _SQL_CHUNK):
+                chunk = keys[i:i + _SQL_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                for key, blob in self._conn.execute(
+                    f"SELECT key, vec FROM embeddings WHERE key IN ({marks})", chunk
+                ):
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+                if found:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET accessed = ? WHERE key IN ({marks})", [now, *chunk]
+                    )
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def set_many(self, items: Dict[str, np.ndarray]):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vec, accessed) VALUES (?, ?, ?)",
+                [(key, np.asarray(vec, dtype=np.float32).tobytes(), now) for key, vec in items.items()],
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop the least recently used vectors above max_entries."""
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                " SELECT key FROM embeddings ORDER BY accessed ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "size": size}
+
+
+class CachedEmbeddingFunction:
+    """
+    Chroma embedding function that consults an EmbeddingCache first and only
+    sends the missing (deduplicated) texts to the wrapped function.
+    """
+
+    def __init__(self, embedding_function, cache: EmbeddingCache, model_id: Optional[str] = None):
+        self.embedding_function = embedding_function
+        self.cache = cache
+        self.model_id = model_id or getattr(embedding_function, "MODEL_NAME", None) \
+            or getattr(embedding_function, "model_name", None) or type(embedding_function).__name__
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        keys = [self.cache.make_key(self.model_id, text) for text in input]
+        found = self.cache.get_many(keys)
+
+        todo = {}  # key -> text, first occurrence only
+        for key, text in zip(keys, input):
+            if key not in found and key not in todo:
+                todo[key] = text
+        if todo:
+            fresh = self.embedding_function(list(todo.values()))
+            new = {key: np.asarray(vec, dtype=np.float32) for key, vec in zip(todo, fresh)}
+            self.cache.set_many(new)
+            found.update(new)
+        # Chroma validates plain Python floats
+        return [found[key].tolist() for key in keys]
@@ -0,0 +1,296 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import weakref
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils import adrive, awith_backoff, drive, with_backoff
+
+
+class GitHubError(RuntimeError):
+    """GitHub fetch failed (rate limit, unknown user, network...)."""
+
+    def __init__(self, message: str, status: int = None, rate_limit: Dict = None,
+                 retryable: bool = False, response=None):
+        super().__init__(message)
+        self.status = status
+        self.rate_limit = rate_limit or {}
+        self.retryable = retryable  # secondary rate limit: worth retrying after a short wait
+        self.response = response    # lets utils.backoff_delay honour Retry-After
+
+
+def _retryable(exc: BaseException) -> bool:
+    return isinstance(exc, GitHubError) and exc.retryable
+
+
+class GitHubFetcher:
+    """
+    Fetch a user's public repos with:
+    - one pooled `requests.Session` (keep-alive across pages / users)
+    - `Link` pagination, pages 2..N fetched concurrently
+    - ETag conditional requests (304s are free against the rate limit)
+    - on-disk cache with a TTL: warm loads need no network at all
+    - backoff on secondary rate limits (429 / Retry-After)
+    Rate-limit headers of the last response are kept in `self.rate_limit`.
+
+    `afetch_repos` / `afetch_projects` are the asyncio versions; they share one
+    pooled `httpx.AsyncClient` per event loop (close it with `aclose`).
+    """
+
+    def __init__(self, cache_dir: str = ".cache/github", ttl: float = 3600,
+                 base_url: str = "https://api.github.com", token: str = None,
+                 timeout: float = 10, max_workers: int = 8):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.rate_limit: Dict = {}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept"] = "application/vnd.github+json"
+        token = token or os.getenv("GITHUB_TOKEN")
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        self._lock = threading.Lock()
+
+        # event loop → (httpx.AsyncClient, Semaphore), created on first async use per loop
+        self._aclients = weakref.WeakKeyDictionary()
+
+    # -------------------------------
+    # Disk cache
+    # -------------------------------
+    def _cache_path(self, username: str) -> str:
+        safe = "".join(c for c in username.lower() if c.isalnum() or c in "-_")
+        return os.path.join(self.cache_dir, f"{safe}.json")
+
+    def _load_cache(self, username: str) -> Dict:
+        try:
+            with open(self._cache_path(username), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, username: str, entry: Dict):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(username)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    # -------------------------------
+    # HTTP
+    # -------------------------------
+    def _check(self, r):
+        """Record rate-limit headers; return `r` on 200/304, else raise GitHubError."""
+        with self._lock:
+            self.rate_limit = {
+                "limit": r.headers.get("X-RateLimit-Limit"),
+                "remaining": r.headers.get("X-RateLimit-Remaining"),
+                "reset": r.headers.get("X-RateLimit-Reset"),
+            }
+        if r.status_code in (200, 304):
+            return r
+        if r.status_code in (403, 429) and r.headers.get("X-RateLimit-Remaining") == "0":
+            reset = r.headers.get("X-RateLimit-Reset")
+            when = time.strftime("%H:%M:%S", time.localtime(int(reset))) if reset else "later"
+            raise GitHubError(f"GitHub rate limit exceeded, resets at {when}.",
+                              r.status_code, self.rate_limit)
+        if r.status_code == 429 or (r.status_code == 403 and r.headers.get("Retry-After")):
+            raise GitHubError("GitHub secondary rate limit hit.", r.status_code, self.rate_limit,
+                              retryable=True, response=r)
+        if r.status_code == 404:
+            raise GitHubError("GitHub user not found.", 404, self.rate_limit)
+        raise GitHubError(f"GitHub API error {r.status_code}.", r.status_code, self.rate_limit)
+
+    def _get(self, url: str, etag: Optional[str]):
+        headers = {"If-None-Match": etag} if etag else {}
+        return with_backoff(
+            lambda: self._check(self.session.get(url, headers=headers, timeout=self.timeout)),
+            retry_on=_retryable,
+        )
+
+    def _async_client(self):
+        """Pooled httpx.AsyncClient + concurrency semaphore for the running event loop."""
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        entry = self._aclients.get(loop)
+        if entry is None:
+            # Clients are bound to the loop they were created on: one per loop, so a client
+            # still in use on another loop is never replaced (or leaked) by this one
+            entry = self._aclients[loop] = (
+                httpx.AsyncClient(
+                    headers=dict(self.session.headers),
+                    timeout=self.timeout,
+                    limits=httpx.Limits(max_connections=self.max_workers,
+                                        max_keepalive_connections=self.max_workers),
+                ),
+                asyncio.Semaphore(self.max_workers),
+            )
+        return entry
+
+    async def _aget(self, url: str, etag: Optional[str]):
+        client, sem = self._async_client()
+        headers = {"If-None-Match": etag} if etag else {}
+
+        async def get():
+            async with sem:
+                return self._check(await client.get(url, headers=headers))
+
+        return await awith_backoff(get, retry_on=_retryable)
+
+    async def aclose(self):
+        """Close the running loop's client (call before the loop ends)."""
+        entry = self._aclients.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[0].aclose()
+
+    @staticmethod
+    def _page_url(url: str, page: int) -> str:
+        parts = urlparse(url)
+        query = parse_qs(parts.query)
+        query["page"] = [str(page)]
+        return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+    @staticmethod
+    def _page_entry(r, cached: Dict) -> Dict:
+        """Cache entry for a page response (the cached one on 304)."""
+        if r.status_code == 304 and "data" in cached:
+            return cached
+        last = r.links.get("last", {}).get("url")
+        return {"etag": r.headers.get("ETag"), "data": r.json(), "last": str(last) if last else None}
+
+    def _fetch_page(self, url: str, cached_pages: Dict) -> Dict:
+        cached = cached_pages.get(url) or {}
+        return self._page_entry(self._get(url, cached.get("etag")), cached)
+
+    async def _afetch_page(self, url: str, cached_pages: Dict) -> Dict:
+        cached = cached_pages.get(url) or {}
+        return self._page_entry(await self._aget(url, cached.get("etag")), cached)
+
+    def _fresh(self, username: str):
+        """(cache entry, repos if still within the TTL else None)."""
+        entry = self._load_cache(username)
+        if entry and time.time() - entry.get("fetched", 0) < self.ttl:
+            return entry, entry["repos"]
+        return entry, None
+
+    def _first_url(self, username: str) -> str:
+        return f"{self.base_url}/users/{username}/repos?per_page=100&page=1"
+
+    def _rest_urls(self, first_url: str, first: Dict) -> List[str]:
+        """URLs of pages 2..last (`last` is kept in the cache: 304s may omit `Link`)."""
+        last_url = first.get("last")
+        if not last_url:
+            return []
+        last = int(parse_qs(urlparse(last_url).query).get("page", ["1"])[0])
+        return [self._page_url(first_url, n) for n in range(2, last + 1)]
+
+    def _store(self, username: str, pages: Dict) -> List[Dict]:
+        repos = [repo for page in pages.values() for repo in (page["data"] or [])]
+        self._save_cache(username, {"fetched": time.time(), "pages": pages, "repos": repos})
+        return repos
+
+    def _stale_or_raise(self, username: str, entry: Dict, e: Exception) -> List[Dict]:
+        if entry.get("repos") is not None:
+            logging.warning(f"GitHub fetch failed, using cached repos for {username}: {e}")
+            return entry["repos"]
+        if isinstance(e, GitHubError):
+            raise e
+        raise GitHubError(f"GitHub request failed: {e}", rate_limit=self.rate_limit) from e
+
+    def _repos_flow(self, username: str):
+        """
+        fetch_repos / afetch_repos: TTL cache, then page 1 and pages 2..N (concurrently),
+        falling back to the stale cache on errors. Yields ("io", fn) for disk work and
+        ("pages", urls, cached pages) for HTTP, answered by `_step` / `_astep`.
+        """
+        entry, repos = yield "io", partial(self._fresh, username)
+        if repos is not None:
+            return repos
+
+        cached_pages = entry.get("pages", {})
+        first_url = self._first_url(username)
+        try:
+            first, = yield "pages", [first_url], cached_pages
+            pages = {first_url: first}
+            urls = self._rest_urls(first_url, first)
+            if urls:
+                pages.update(zip(urls, (yield "pages", urls, cached_pages)))
+        except (GitHubError, ValueError) as e:
+            return self._stale_or_raise(username, entry, e)
+        return (yield "io", partial(self._store, username, pages))
+
+    def _step(self, request):
+        kind, *args = request
+        if kind == "io":
+            return args[0]()
+        urls, cached_pages = args
+        try:
+            if len(urls) == 1:
+                return [self._fetch_page(urls[0], cached_pages)]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                return list(pool.map(lambda u: self._fetch_page(u, cached_pages), urls))
+        except requests.RequestException as e:
+            raise GitHubError(f"GitHub request failed: {e}", rate_limit=self.rate_limit) from e
+
+    async def _astep(self, request):
+        import httpx
+
+        kind, *args = request
+        if kind == "io":
+            return await asyncio.to_thread(args[0])
+        urls, cached_pages = args
+        try:
+            return await asyncio.gather(*(self._afetch_page(u, cached_pages) for u in urls))
+        except httpx.HTTPError as e:
+            raise GitHubError(f"GitHub request failed: {e}", rate_limit=self.rate_limit) from e
+
+    def fetch_repos(self, username: str) -> List[Dict]:
+        """
+        Raw repo dicts for `username`.
+        Served from disk within the TTL; a stale cache is returned (with a warning)
+        if GitHub fails, otherwise GitHubError is raised.
+        """
+        return drive(self._repos_flow(username), self._step)
+
+    async def afetch_repos(self, username: str) -> List[Dict]:
+        """Async version of `fetch_repos` (pages 2..N fetched concurrently on the shared client)."""
+        return await adrive(self._repos_flow(username), self._astep)
+
+    @staticmethod
+    def _to_rows(repos: List[Dict]) -> List[Dict]:
+        """Repos as portfolio rows (Title, Techstack, Links + Description, Stars)."""
+        rows = []
+        for repo in repos:
+            stack = [repo.get("language") or "Unknown"] + list(repo.get("topics") or [])
+            rows.append({
+                "Title": repo.get("name") or "Untitled Project",
+                "Techstack": ", ".join(stack),
+                "Links": repo.get("html_url", ""),
+                "Description": repo.get("description") or "",
+                "Stars": int(repo.get("stargazers_count") or 0),
+            })
+        return rows
+
+    def fetch_projects(self, username: str) -> List[Dict]:
+        """Repos as portfolio rows (Title, Techstack, Links + Description, Stars)."""
+        return self._to_rows(self.fetch_repos(username))
+
+    async def afetch_projects(self, username: str) -> List[Dict]:
+        """Async version of `fetch_projects`."""
+        return self._to_rows(await self.afetch_repos(username))
@@ -0,0 +1,238 @@
+"""
+Local (no-LLM) job-description pre-parser + the typed schema for extracted jobs.
+
+`parse_jd` pulls role, years of experience and skills out of raw JD text with
+regexes and a skills dictionary in well under a millisecond. Chain.extract_jobs
+only asks the LLM for the fields this pass could not find with confidence
+(a job-title-like role, at least MIN_SKILLS distinct skills).
+"""
+import re
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+# Canonical skill name → regex alternatives (matched case-insensitively on word boundaries).
+# Only patterns that are not ordinary English words belong here; see AMBIGUOUS_SKILLS.
+SKILLS = {
+    "Python": r"python",
+    "Java": r"java(?!\s*script)",
+    "JavaScript": r"javascript",
+    "TypeScript": r"typescript",
+    "C++": r"c\+\+",
+    "C#": r"c#",
+    "Go": r"golang",
+    "SQL": r"sql|mysql|postgres(?:ql)?",
+    "NoSQL": r"nosql|mongodb",
+    "Machine Learning": r"machine learning",
+    "Deep Learning": r"deep learning",
+    "NLP": r"nlp|natural language processing",
+    "Computer Vision": r"computer vision|opencv",
+    "LLMs": r"llms?|large language models?",
+    "Generative AI": r"generative ai|genai|gen ai",
+    "RAG": r"rag|retrieval[- ]augmented generation",
+    "LangChain": r"langchain",
+    "Vector Databases": r"vector (?:databases?|dbs?|stores?)",
+    "ChromaDB": r"chroma(?:db)?",
+    "FAISS": r"faiss",
+    "Hugging Face": r"hugging ?face|transformers",
+    "PyTorch": r"pytorch",
+    "TensorFlow": r"tensorflow|keras",
+    "Scikit-learn": r"scikit[- ]learn|sklearn",
+    "Pandas": r"pandas",
+    "NumPy": r"numpy",
+    "Spark": r"pyspark|apache spark",
+    "Streamlit": r"streamlit",
+    "FastAPI": r"fastapi",
+    "Django": r"django",
+    "Flask": r"flask",
+    "React": r"react\.?js|react native",
+    "Node.js": r"node\.?js",
+    "REST APIs": r"rest(?:ful)? apis?",
+    "Docker": r"docker",
+    "Kubernetes": r"kubernetes|k8s",
+    "AWS": r"aws|amazon web services",
+    "GCP": r"gcp|google cloud",
+    "Azure": r"azure",
+    "Git": r"github|gitlab",
+    "Linux": r"linux",
+    "CI/CD": r"ci/cd|continuous integration",
+    "Power BI": r"power ?bi",
+    "Tableau": r"tableau",
+    "Excel": r"(?:ms|microsoft) excel",
+    "Recommendation Systems": r"recommendation systems?|recommender systems?",
+    "MLOps": r"mlops",
+}
+# Skill names that are also common English words / abbreviations ("go the extra mile",
+# "excel at", "send your CV", "350 ml"): only counted next to an unambiguous skill
+AMBIGUOUS_SKILLS = {
+    "Go": r"(?-i:Go)",
+    "Rust": r"rust",
+    "JavaScript": r"js",
+    "Machine Learning": r"ml",
+    "Computer Vision": r"cv",
+    "Spark": r"spark",
+    "React": r"react",
+    "Node.js": r"node",
+    "Git": r"git",
+    "Excel": r"excel",
+}
+# How close (in characters) an unambiguous skill must be, e.g. within the same skills list
+SKILL_CONTEXT_CHARS = 60
+# Fewer distinct skills than this → ask the LLM for the skills
+MIN_SKILLS = 3
+
+
+def _skill_re(patterns) -> re.Pattern:
+    return re.compile(
+        "(?<![\\w+#])(?:" + "|".join(f"(?P<s{i}>{pat})" for i, pat in enumerate(patterns)) + ")(?![\\w+#])",
+        re.IGNORECASE,
+    )
+
+
+_SKILL_RE = _skill_re(SKILLS.values())
+_SKILL_NAMES = list(SKILLS)
+_AMBIGUOUS_RE = _skill_re(AMBIGUOUS_SKILLS.values())
+_AMBIGUOUS_NAMES = list(AMBIGUOUS_SKILLS)
+
+_YEARS_RE = re.compile(
+    r"(\d{1,2})\s*(?:\+|(?:-|–|to)\s*(\d{1,2}))?\s*\+?\s*(?:years?|yrs?)", re.IGNORECASE
+)
+# A years figure only counts as experience with one of these nearby ("for 10 years" alone doesn't)
+_EXPERIENCE_CONTEXT_RE = re.compile(
+    r"experience|exp\b|require|minimum|at least|qualification|background in", re.IGNORECASE
+)
+EXPERIENCE_CONTEXT_CHARS = 40
+
+_ROLE_NOUNS = (r"(?:Engineer|Developer|Scientist|Analyst|Architect|Manager|Designer|Intern|Consultant|"
+               r"Specialist|Researcher|Lead|Administrator)")
+_ROLE_LABEL_RE = re.compile(r"^\s*(?:job\s*title|title|role|position)\s*[:\-–]\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+# A labelled value is only taken as the role when it reads like a job title
+_TITLE_RE = re.compile(r"^(?:[\w+#/.&()-]+\s+){0,5}" + _ROLE_NOUNS + r"s?\b[\w\s,()/-]{0,30}$", re.IGNORECASE)
+_ROLE_PHRASE_RE = re.compile(
+    r"(?:looking for|hiring|seeking|searching for)\s+(?:an?\s+|the\s+)?"
+    r"((?:[A-Z][\w+#/.-]*\s+){0,4}?" + _ROLE_NOUNS + ")",
+)
+_ROLE_LINE_RE = re.compile(
+    r"^\s*((?:[A-Z][\w+#/.-]*\s+){0,4}" + _ROLE_NOUNS + r")\s*$",
+    re.MULTILINE,
+)
+
+DESCRIPTION_CHARS = 600
+
+
+@dataclass
+class JobPosting:
+    """Typed schema for one extracted job posting."""
+    role: str
+    experience: str = ""
+    skills: List[str] = field(default_factory=list)
+    description: str = ""
+
+    @classmethod
+    def validate(cls, data) -> "JobPosting":
+        """Coerce / check an LLM (or merged) dict; raises ValueError when unusable."""
+        if not isinstance(data, dict):
+            raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+        role = data.get("role")
+        if not isinstance(role, str) or not role.strip():
+            raise ValueError("'role' must be a non-empty string")
+        skills = data.get("skills")
+        if isinstance(skills, str):
+            skills = [s.strip() for s in re.split(r"[,;|\n]", skills) if s.strip()]
+        if not isinstance(skills, list) or not all(isinstance(s, str) for s in skills):
+            raise ValueError("'skills' must be a list of strings")
+        experience = data.get("experience") or ""
+        if isinstance(experience, (int, float)):
+            experience = f"{experience} years"
+        description = data.get("description") or ""
+        if not isinstance(experience, str) or not isinstance(description, str):
+            raise ValueError("'experience' and 'description' must be strings")
+        return cls(role=role.strip(), experience=experience.strip(),
+                   skills=[s.strip() for s in skills if s.strip()], description=description.strip())
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def extract_skills(text: str) -> List[str]:
+    """
+    Dictionary skills mentioned in the text, in order of first mention.
+    Ambiguous names ("Go", "Excel", "CV") only count within SKILL_CONTEXT_CHARS of an unambiguous skill.
+    """
+    text = text or ""
+    hits = [(m.start(), _SKILL_NAMES[int(m.lastgroup[1:])]) for m in _SKILL_RE.finditer(text)]
+    anchors = [pos for pos, _ in hits]
+    for m in _AMBIGUOUS_RE.finditer(text):
+        if any(abs(m.start() - pos) <= SKILL_CONTEXT_CHARS for pos in anchors):
+            hits.append((m.start(), _AMBIGUOUS_NAMES[int(m.lastgroup[1:])]))
+    found = []
+    for _, name in sorted(hits):
+        if name not in found:
+            found.append(name)
+    return found
+
+
+def extract_experience(text: str) -> str:
+    text = text or ""
+    for m in _YEARS_RE.finditer(text):
+        window = text[max(0, m.start() - EXPERIENCE_CONTEXT_CHARS):m.end() + EXPERIENCE_CONTEXT_CHARS]
+        if not _EXPERIENCE_CONTEXT_RE.search(window):
+            continue
+        low, high = m.group(1), m.group(2)
+        if high:
+            return f"{low}-{high} years"
+        return f"{low}+ years" if "+" in m.group(0) else f"{low} years"
+    return ""
+
+
+def extract_role(text: str) -> str:
+    for m in _ROLE_LABEL_RE.finditer(text or ""):
+        value = m.group(1).strip().rstrip(".,")
+        if _TITLE_RE.match(value):
+            return value
+    for regex in (_ROLE_PHRASE_RE, _ROLE_LINE_RE):
+        m = regex.search(text or "")
+        if m:
+            return m.group(1).strip().rstrip(".,")
+    return ""
+
+
+def extract_description(text: str, limit: int = DESCRIPTION_CHARS) -> str:
+    """Whitespace-normalized JD, cut at a sentence boundary within `limit` chars."""
+    flat = " ".join((text or "").split())
+    if len(flat) <= limit:
+        return flat
+    cut = flat[:limit]
+    end = cut.rfind(". ")
+    return cut[:end + 1] if end > limit // 2 else cut
+
+
+def parse_jd(text: str) -> Dict:
+    """Best-effort local extraction; empty values mean "not found"."""
+    return {
+        "role": extract_role(text),
+        "experience": extract_experience(text),
+        "skills": extract_skills(text),
+        "description": extract_description(text),
+    }
+
+
+# Fields that must be present before the LLM can be skipped (experience is often not stated)
+REQUIRED_FIELDS = ("role", "skills")
+
+
+def missing_fields(job: Dict) -> List[str]:
+    """Required fields not found with enough confidence to skip the LLM."""
+    missing = [f for f in REQUIRED_FIELDS if not job.get(f)]
+    if "skills" not in missing and len(job.get("skills") or []) < MIN_SKILLS:
+        missing.append("skills")
+    return missing
+
+
+def merge(local: Dict, llm: Optional[Dict], fields: List[str]) -> Dict:
+    """Local result with the requested `fields` taken from the LLM answer (when it has them)."""
+    merged = dict(local)
+    if isinstance(llm, dict):
+        for key in fields:
+            if llm.get(key):
+                merged[key] = llm[key]
+    return merged
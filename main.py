@@ -1,6 +1,15 @@
+import uuid
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
-from portfolio import Portfolio
+from portfolio import Portfolio, PortfolioRegistry
 from chain import Chain
+from prefetch import Prefetcher
+from tracing import stage, trace_request
+
+# Seconds the JD must stay unchanged before it is extracted in the background
+JD_DEBOUNCE_S = 0.8
 
 st.set_page_config(page_title="ResuMatch AI", page_icon="📧", layout="centered")
 st.title("📧 ResuMatch AI – Smart Cold Email & Resume Generator")
@@ -69,6 +78,7 @@ with col1:
     email_btn = st.button("Generate Cold Email")
 with col2:
     resume_btn = st.button("Generate Resume (.docx)")
+show_debug = st.sidebar.checkbox("Show debug timings", value=False)
 
 # ✅ Require JD before proceeding
 if (email_btn or resume_btn) and not jd_text.strip():
@@ -76,69 +86,150 @@ if (email_btn or resume_btn) and not jd_text.strip():
     st.stop()
 
 # ---------------------------
-# Build Portfolio (GitHub or Form)
+# Background prefetch (JD extraction, Chain, Portfolio)
 # ---------------------------
-portfolio = None
+# Started as soon as the inputs are there, so that clicking Generate only waits
+# for the email / resume. Tasks run off the script thread: no st.* calls inside.
+@st.cache_resource(show_spinner=False)
+def get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="prefetch")
+
+
+@st.cache_resource(show_spinner=False)
+def get_registry() -> PortfolioRegistry:
+    # Warm portfolios shared by all sessions: rebuilt only when the username / manual projects change.
+    # Manual projects are kept per session; sessions from a previous run are gone, so their
+    # collections are dropped before the first form build (not here: page load stays Chroma-free).
+    return PortfolioRegistry(max_tenants=32, stale_owners="form:session:")
+
+
+@st.cache_resource(show_spinner=False)
+def get_chain_future():
+    # One LLM client per process (reads GROQ key from env or st.secrets), built in the background
+    return get_executor().submit(Chain)
+
+
+def get_chain() -> Chain:
+    try:
+        return get_chain_future().result()
+    except Exception as e:
+        get_chain_future.clear()  # e.g. missing key: retry on the next click
+        # Built off the script thread, so Chain's own st.error never reaches the page: report it here
+        if "GROQ_API_KEY" in str(e):
+            st.error("GROQ_API_KEY not found. Add it in Streamlit → Settings → Secrets.")
+        else:
+            st.error(f"Could not start the LLM client: {e}")
+        st.stop()
+
+
+if "prefetch" not in st.session_state:
+    st.session_state["prefetch"] = Prefetcher(get_executor())
+    st.session_state["session_id"] = uuid.uuid4().hex
+prefetch = st.session_state["prefetch"]
+registry = get_registry()
+get_chain_future()
+
+jd_key = hashlib.sha1(jd_text.encode("utf-8")).hexdigest()
+
+
+def extract_job(jd: str = jd_text) -> dict:
+    # expect dict with role/experience/skills/description
+    return get_chain_future().result().extract_jobs(jd)[0]
+
+
 if github_username.strip():
-    portfolio = Portfolio.from_github(github_username.strip())
-    # Optional UX: if GitHub yielded nothing, hint user to use manual
-    if getattr(portfolio, "data", None) is not None and portfolio.data.empty:
-        st.info("Couldn’t fetch GitHub repos (rate limit or username issue). Add projects manually below.")
+    portfolio_source = {"github": github_username.strip()}
 else:
-    portfolio = Portfolio.from_form(projects)
+    portfolio_source = {"projects": [dict(sorted(p.items())) for p in projects]}
+portfolio_key = repr(portfolio_source)
+
+
+session_tenant = f"session:{st.session_state['session_id']}"
+
 
-# Load vector index (or fallback cache)
-portfolio.load_portfolio()
+def load_portfolio(source: dict = portfolio_source, form_tenant: str = session_tenant):
+    # GitHub portfolios are shared by all sessions; manual projects live in this session's collection
+    if not source.get("github") and not source.get("projects"):
+        return Portfolio(use_chroma=False)  # nothing to index: no collection for this session
+    portfolio = registry.get("streamlit" if source.get("github") else form_tenant, source)
+    if source.get("github") and not len(portfolio):
+        # Raising marks the prefetch as failed, so the next click fetches again (rate limit / typo)
+        raise ValueError(portfolio.fetch_error or f"No public repos found for {source['github']}.")
+    return portfolio
+
+
+if jd_text.strip():
+    prefetch.submit("extract", jd_key, extract_job, delay=JD_DEBOUNCE_S)
+else:
+    prefetch.cancel("extract")
+if github_username.strip() or projects:
+    prefetch.submit("portfolio", portfolio_key, load_portfolio)
+else:
+    prefetch.cancel("portfolio")
 
 # ---------------------------
 # Generate (Email / Resume)
 # ---------------------------
 if email_btn or resume_btn:
-    # Initialize LLM chain (reads GROQ key from env or st.secrets)
-    chain = Chain()
-
-    # ✅ Safe JD parsing (LLM → structured JSON)
-    try:
-        job_info = chain.extract_jobs(jd_text)[0]  # expect dict with role/experience/skills/description
-    except Exception as e:
-        st.error(f"Could not parse the Job Description. Try a simpler JD. Details: {e}")
-        st.stop()
-
-    # Query matching portfolio links using JD text as query terms
-    links_flat = portfolio.query_links(jd_text)
-    if not links_flat:  # final guard
-        links_flat = portfolio.top_n_fallback(n=3)
-
-    if email_btn:
-        with st.spinner("Writing your cold email..."):
-            email_text = chain.write_mail(
-                job=job_info,
-                links_flat=links_flat,
-                user_name=user_name,
-                user_background=user_background,
-                user_email=user_email
-            )
-        st.success("Cold email ready. You can copy it below:")
-        st.text_area("Email", value=email_text, height=300)
-
-    if resume_btn:
-        with st.spinner("Building your ATS-friendly resume..."):
-            file_path = chain.write_resume(
-                job=job_info,
-                user_name=user_name,
-                user_background=user_background,
-                user_email=user_email,
-                projects=links_flat
-            )
-        st.success("Resume ready.")
-        # Offer download
-        with open(file_path, "rb") as f:
+    with trace_request("streamlit", email=bool(email_btn), resume=bool(resume_btn)) as trace:
+        chain = get_chain()
+
+        # ✅ Safe JD parsing (LLM → structured JSON), usually already done in the background
+        try:
+            with stage("wait_extract", prefetched=prefetch.ready("extract", jd_key)):
+                job_info = prefetch.result("extract", jd_key, extract_job)
+        except Exception as e:
+            st.error(f"Could not parse the Job Description. Try a simpler JD. Details: {e}")
+            st.stop()
+
+        try:
+            with stage("wait_portfolio", prefetched=prefetch.ready("portfolio", portfolio_key)):
+                portfolio = prefetch.result("portfolio", portfolio_key, load_portfolio)
+        except ValueError as e:
+            # Optional UX: if GitHub yielded nothing, hint user to use manual
+            st.info(f"Couldn’t fetch GitHub repos: {e} Add projects manually below.")
+            portfolio = load_portfolio({"projects": []})
+
+        # Query matching portfolio links using the extracted skills (raw JD as a fallback)
+        links_flat = portfolio.query_links(job_info.get("skills") or jd_text)
+        if not links_flat:  # final guard
+            links_flat = portfolio.top_n_fallback(n=3)
+
+        if email_btn:
+            # Render tokens as they arrive (write_stream returns the full text)
+            with st.empty():
+                email_text = st.write_stream(chain.stream_mail(
+                    job=job_info,
+                    links_flat=links_flat,
+                    user_name=user_name,
+                    user_background=user_background,
+                    user_email=user_email
+                ))
+                st.text_area("Email", value=email_text, height=300)
+            st.success("Cold email ready. You can copy it above.")
+
+        if resume_btn:
+            with st.spinner("Building your ATS-friendly resume..."):
+                resume_bytes = chain.render_resume(
+                    job=job_info,
+                    user_name=user_name,
+                    user_background=user_background,
+                    user_email=user_email,
+                    projects=links_flat
+                )
+            st.success("Resume ready.")
+            # Offer download (rendered in memory, nothing written to disk)
             st.download_button(
                 label="⬇️ Download Resume (.docx)",
-                data=f.read(),
-                file_name=file_path,
+                data=resume_bytes,
+                file_name=chain.resume_file_name(user_name),
                 mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
             )
 
+    # Per-stage timings / tokens / cache hits for this generation
+    if show_debug:
+        with st.expander("⏱️ Debug: stage timings"):
+            st.json(trace.to_dict())
+
 # Footer
 st.caption("Tip: Provide a clean JD and 2–5 strong project links for best results.")
@@ -1,58 +1,246 @@
+import os
+import json
 import uuid
+import hashlib
 import logging
-import requests
-import pandas as pd
-from typing import List, Dict
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Tuple, TYPE_CHECKING
 
-class Portfolio:
-    def __init__(self, data=None, file_path=None):
-        # Try to use Chroma; if it fails on Cloud, fall back to in-memory matching
-        self.collection = None
-        self._fallback_rows = []
-        try:
+import numpy as np
+
+from project_table import ProjectTable
+from ranking import LexicalIndex, tokenize
+from tracing import traced
+from utils import adrive, drive
+
+if TYPE_CHECKING:
+    from embed_cache import EmbeddingCache
+    from github_fetch import GitHubFetcher
+
+UPSERT_BATCH_SIZE = 100
+# Hybrid ranking: fused score = w * cosine similarity + (1 - w) * normalized BM25
+SEMANTIC_WEIGHT = 0.6
+
+# Shared across portfolios: pooled HTTP session + on-disk response cache
+_github_fetcher = None
+
+# Shared Chroma clients, one per storage folder (chromadb is imported on first use)
+_chroma_clients = {}
+_chroma_lock = threading.Lock()
+
+# Shared on-disk embedding cache (same text → same vector across portfolios)
+_embedding_cache = None
+
+
+def github_fetcher() -> "GitHubFetcher":
+    global _github_fetcher
+    if _github_fetcher is None:
+        from github_fetch import GitHubFetcher
+        _github_fetcher = GitHubFetcher()
+    return _github_fetcher
+
+
+def embedding_cache() -> "EmbeddingCache":
+    global _embedding_cache
+    with _chroma_lock:
+        if _embedding_cache is None:
+            from embed_cache import EmbeddingCache
+            _embedding_cache = EmbeddingCache(os.getenv("RESUMATCH_EMBED_CACHE_PATH", ".cache/embeddings.sqlite"))
+        return _embedding_cache
+
+
+def chroma_client(persist_dir: str = "vectorstore"):
+    """Process-wide PersistentClient for `persist_dir`, created on first call."""
+    with _chroma_lock:
+        client = _chroma_clients.get(persist_dir)
+        if client is None:
             import chromadb
-            self.chroma_client = chromadb.PersistentClient('vectorstore')  # writable local dir
-            self.collection = self.chroma_client.get_or_create_collection(name="portfolio")
-        except Exception as e:
-            self.chroma_client = None
-            logging.warning(f"Chroma disabled; using simple matching. Reason: {e}")
+            from chromadb.config import Settings
+            client = chromadb.PersistentClient(persist_dir, settings=Settings(anonymized_telemetry=False))
+            _chroma_clients[persist_dir] = client
+        return client
+
+
+def collection_name(owner: str = None) -> str:
+    """Chroma collection per portfolio owner (valid name: 3-63 chars, alphanumeric ends)."""
+    if not owner:
+        return "portfolio"
+    return f"portfolio_{hashlib.sha1(owner.strip().lower().encode('utf-8')).hexdigest()[:16]}"
+
+
+def drop_collections(owner_prefix: str, persist_dir: str = "vectorstore") -> int:
+    """Delete every Chroma collection whose owner starts with `owner_prefix`; returns how many."""
+    client = chroma_client(persist_dir)
+    dropped = 0
+    for col in client.list_collections():
+        if str((col.metadata or {}).get("owner", "")).startswith(owner_prefix):
+            client.delete_collection(col.name)
+            dropped += 1
+    return dropped
+
+
+def row_hash(title: str, techstack: str, link: str, description: str = "") -> str:
+    """Content hash of a row, used to skip re-embedding unchanged projects."""
+    return hashlib.sha1(f"{title}\x1f{techstack}\x1f{link}\x1f{description}".encode("utf-8")).hexdigest()
+
+
+def doc_text(title: str, techstack: str, description: str = "") -> str:
+    """Text embedded and BM25-indexed for a project: title, tech stack and description."""
+    return " | ".join(part for part in (title, techstack, description) if part) or "project"
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
 
+
+class Portfolio:
+    def __init__(self, data=None, file_path=None, owner: str = None, persist_dir: str = "vectorstore",
+                 embedding_function=None, use_chroma: bool = True, embedding_cache=None,
+                 semantic_weight: float = SEMANTIC_WEIGHT):
+        """
+        persist_dir: Chroma storage folder
+        embedding_function: custom Chroma embedding function (default: Chroma's own)
+        use_chroma: False forces the in-memory fallback ranking
+        embedding_cache: EmbeddingCache in front of the embedding function
+            (default: the shared one under .cache/, False disables it)
+        semantic_weight: share of vector similarity (vs BM25) in the hybrid score
+        """
+        self.owner = owner
+        self.fetch_error = None  # set by from_github when GitHub could not be reached
+        self.semantic_weight = semantic_weight
+        self._fallback_index = None
+
+        # Hybrid ranking state, built by load_portfolio on the Chroma path:
+        # one entry per indexed project (unit-norm vectors, BM25 index, (title, link))
+        self._ef = None
+        self._vectors = None
+        self._lexical = None
+        self._projects = []
+        self._row_of = {}
+
+        # Chroma collection is opened lazily (see `collection`)
+        self._persist_dir = persist_dir
+        self._embedding_function = embedding_function
+        self._embedding_cache = embedding_cache
+        self._use_chroma = use_chroma
+        self._collection = None
+        self._chroma_checked = False
+
+        # Rows are kept in a compact columnar table (Title / Techstack / Links + extras)
+        self._frame = None  # DataFrame view of the table, built on first `data` access
         if file_path:
-            self.data = pd.read_csv(file_path)
-        elif data:
-            self.data = pd.DataFrame(data)
+            self.table = ProjectTable.from_csv(file_path)
+        elif data is not None and len(data):
+            self.table = ProjectTable.from_records(data)
         else:
-            self.data = pd.DataFrame(columns=["Title", "Techstack", "Links"])
+            self.table = ProjectTable.empty()
 
-        # Normalize columns
-        for col in ["Title", "Techstack", "Links"]:
-            if col not in self.data.columns:
-                self.data[col] = ""
-        self.data["Title"] = self.data["Title"].astype(str).fillna("")
-        self.data["Techstack"] = self.data["Techstack"].astype(str).fillna("")
-        self.data["Links"] = self.data["Links"].astype(str).fillna("")
+    @property
+    def table(self) -> ProjectTable:
+        return self._table
+
+    @table.setter
+    def table(self, table: ProjectTable):
+        # ProjectTable is immutable: swapping it is the only change, so the cached frame goes with it
+        self._table = table
+        self._frame = None
+
+    @property
+    def data(self):
+        """
+        The rows as a pandas DataFrame, built once per table (use `table` in hot paths).
+        Treat it as read-only; assign `table` to change the rows.
+        """
+        if self._frame is None:
+            self._frame = self.table.to_frame()
+        return self._frame
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    @property
+    def collection(self):
+        """
+        Chroma collection for this portfolio, opened on first access.
+        None if Chroma is disabled or fails (e.g. on Cloud) → in-memory matching.
+        """
+        if not self._chroma_checked:
+            self._chroma_checked = True
+            try:
+                if not self._use_chroma:
+                    raise RuntimeError("disabled by caller")
+                client = chroma_client(self._persist_dir)
+                self._ef = self._cached_embedding_function()
+                self._collection = client.get_or_create_collection(
+                    name=collection_name(self.owner), embedding_function=self._ef,
+                    metadata={"owner": self.owner or ""},  # lets drop_collections find it
+                )
+            except Exception as e:
+                logging.warning(f"Chroma disabled; using simple matching. Reason: {e}")
+        return self._collection
+
+    def drop_collection(self):
+        """Delete this portfolio's Chroma collection (e.g. when its session / tenant goes away)."""
+        if self._collection is None:
+            return
+        try:
+            chroma_client(self._persist_dir).delete_collection(self._collection.name)
+        except Exception as e:
+            logging.warning(f"Could not drop collection for {self.owner}: {e}")
+        self._collection = None
+        self._vectors = None
+
+    def _cached_embedding_function(self):
+        """The embedding function (Chroma's default unless given), behind the embedding cache."""
+        from chromadb.utils import embedding_functions
+        from embed_cache import CachedEmbeddingFunction
+
+        fn = self._embedding_function or embedding_functions.DefaultEmbeddingFunction()
+        if self._embedding_cache is False:
+            return fn
+        return CachedEmbeddingFunction(fn, self._embedding_cache or embedding_cache())
 
     @classmethod
-    def from_github(cls, username: str):
-        """Fetch public repos from GitHub as portfolio items."""
-        url = f"https://api.github.com/users/{username}/repos?per_page=100"
-        projects = []
+    def _github_flow(cls, username: str, **kwargs):
+        """from_github / afrom_github: yields the username to fetch, gets its rows back."""
+        from github_fetch import GitHubError
+
+        projects, error = [], None
         try:
-            r = requests.get(url, timeout=15)
-            if r.status_code == 200:
-                for repo in r.json():
-                    projects.append({
-                        "Title": repo.get("name") or "Untitled Project",
-                        "Techstack": repo.get("language") or "Unknown",
-                        "Links": repo.get("html_url", "")
-                    })
-        except Exception:
-            pass
-        return cls(data=projects)
+            projects = yield username
+        except GitHubError as e:
+            error = str(e)
+            logging.warning(f"GitHub fetch failed for {username}: {e}")
+        portfolio = cls(data=projects, owner=f"github:{username}", **kwargs)
+        portfolio.fetch_error = error
+        return portfolio
+
+    @classmethod
+    def from_github(cls, username: str, fetcher: "GitHubFetcher" = None, **kwargs):
+        """
+        Fetch public repos from GitHub as portfolio items (all pages, cached on disk).
+        Failures give an empty portfolio with the reason in `fetch_error`.
+        Extra kwargs go to the Portfolio constructor.
+        """
+        fetcher = fetcher or github_fetcher()
+        return drive(cls._github_flow(username, **kwargs), fetcher.fetch_projects)
+
+    @classmethod
+    async def afrom_github(cls, username: str, fetcher: "GitHubFetcher" = None, **kwargs):
+        """Async version of `from_github` (repos fetched on the fetcher's shared async client)."""
+        fetcher = fetcher or github_fetcher()
+        return await adrive(cls._github_flow(username, **kwargs), fetcher.afetch_projects)
 
     @classmethod
-    def from_form(cls, user_projects: List[Dict]):
-        """Create portfolio from Streamlit form input."""
+    def from_form(cls, user_projects: List[Dict], owner: str = "form", **kwargs):
+        """
+        Create portfolio from Streamlit form input.
+        Pass a stable per-user owner (session / tenant id) so different users' manual projects
+        never mix; edits to the list are then diffed into the same collection by load_portfolio.
+        """
         rows = []
         for p in user_projects:
             rows.append({
@@ -60,85 +248,330 @@ class Portfolio:
                 "Techstack": p.get("Techstack", ""),
                 "Links": p.get("Links", "")
             })
-        return cls(data=rows)
+        return cls(data=rows, owner=owner, **kwargs)
+
+    def _descriptions(self) -> List[str]:
+        if "Description" in self.table.columns:
+            return self.table.column("Description")
+        return [""] * len(self.table)
 
+    @traced("load_portfolio")
     def load_portfolio(self):
-        """Index projects in Chroma (id stable by URL to avoid dupes)."""
+        """
+        Sync projects into Chroma (id stable by URL to avoid dupes).
+        Only new / changed rows are embedded; rows that disappeared are deleted.
+        Also keeps the normalized vectors + a BM25 index in memory for hybrid re-ranking.
+        """
         if self.collection is None:
-            # Fallback: cache rows for naive ranking
-            self._fallback_rows = self.data.to_dict("records")
+            # Fallback: BM25 index over Title + Techstack + Description (rows stay in the table)
+            self._fallback_index = LexicalIndex(
+                doc_text(title, techstack, description)
+                for (title, techstack, _), description in zip(self.table.rows(), self._descriptions())
+            )
             return
 
-        if self.collection.count() == 0 and not self.data.empty:
-            docs, metas, ids = [], [], []
-            for _, row in self.data.iterrows():
-                link = row["Links"]
-                if not link:
-                    continue
-                docs.append(row["Techstack"] or "project")
-                metas.append({"links": link, "title": row.get("Title", "")})
-                ids.append(f"pid_{uuid.uuid5(uuid.NAMESPACE_URL, link)}")
-            if docs:
-                self.collection.add(documents=docs, metadatas=metas, ids=ids)
+        wanted = self._wanted()
+
+        # Current state: hashes (and vectors) stored alongside each indexed row
+        current, vectors = {}, {}
+        for pid, meta, vec in self._stored():
+            current[pid] = meta.get("hash")
+            vectors[pid] = vec
+
+        changed = [pid for pid, (_, meta) in wanted.items() if current.get(pid) != meta["hash"]]
+        removed = [pid for pid in current if pid not in wanted]
+
+        for i in range(0, len(changed), UPSERT_BATCH_SIZE):
+            batch = changed[i:i + UPSERT_BATCH_SIZE]
+            embeddings = self._ef([wanted[pid][0] for pid in batch])
+            # Documents are not stored: ranking only needs the vectors, and skipping them
+            # saves Chroma's full-text indexing on every upsert
+            self.collection.upsert(
+                ids=batch,
+                embeddings=embeddings,
+                metadatas=[wanted[pid][1] for pid in batch],
+            )
+            vectors.update(zip(batch, embeddings))
+        if removed:
+            self.collection.delete(ids=removed)
+
+        self._build_index([(pid, doc, meta, vectors[pid]) for pid, (doc, meta) in wanted.items()])
+
+    def _wanted(self) -> Dict[str, Tuple[str, Dict]]:
+        """Desired state, keyed by stable id (last row wins for duplicate links): id → (doc text, metadata)."""
+        wanted = {}
+        for (title, techstack, link), description in zip(self.table.rows(), self._descriptions()):
+            if not link:
+                continue
+            pid = f"pid_{uuid.uuid5(uuid.NAMESPACE_URL, link)}"
+            wanted[pid] = (
+                doc_text(title, techstack, description),
+                {"links": link, "title": title, "hash": row_hash(title, techstack, link, description)},
+            )
+        return wanted
 
+    def _stored(self):
+        """(id, metadata, embedding) of every row already in the Chroma collection."""
+        existing = self.collection.get(include=["metadatas", "embeddings"])
+        # Explicit None checks: Chroma may hand back numpy arrays, whose truth value is ambiguous
+        ids = existing.get("ids")
+        metadatas = existing.get("metadatas")
+        embeddings = existing.get("embeddings")
+        if ids is None or embeddings is None:
+            return []
+        if metadatas is None:
+            metadatas = [None] * len(ids)
+        return [(pid, meta or {}, vec) for pid, meta, vec in zip(ids, metadatas, embeddings)]
+
+    def _build_index(self, entries: List[Tuple[str, str, Dict, List[float]]]):
+        """In-memory side of the hybrid ranker from (id, doc text, metadata, vector); row i ↔ self._projects[i]."""
+        self._projects = [(meta.get("title", ""), meta.get("links", "")) for _, _, meta, _ in entries]
+        self._row_of = {pid: i for i, (pid, _, _, _) in enumerate(entries)}
+        if entries:
+            self._vectors = _normalize_rows(np.asarray([vec for _, _, _, vec in entries], dtype=np.float32))
+        else:
+            self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._lexical = LexicalIndex(doc for _, doc, _, _ in entries)
+
+    def _load_index(self):
+        """
+        Build the in-memory ranker from what the collection already holds (no embedding calls),
+        e.g. when a persisted portfolio is queried without load_portfolio in this process.
+        """
+        docs = {pid: doc for pid, (doc, _) in self._wanted().items()}
+        self._build_index([
+            (pid, docs.get(pid) or meta.get("title", ""), meta, vec)
+            for pid, meta, vec in self._stored()
+        ])
+
+    @staticmethod
+    def _query_texts(skills) -> List[str]:
+        """Chroma query texts for one skills input (str or list)."""
+        if isinstance(skills, str):
+            return [skills] if skills.strip() else ["software engineering"]
+        safe_skills = [s for s in (skills or []) if isinstance(s, str) and s.strip()]
+        return ["; ".join(safe_skills[:10])] + safe_skills[:3] if safe_skills else ["software engineering"]
+
+    @staticmethod
+    def _query_terms(skills) -> List[str]:
+        """Lexical terms for one skills input (str or list)."""
+        if isinstance(skills, str):
+            return tokenize(skills.replace("|", ","))
+        return [t for s in (skills or []) for t in tokenize(str(s))]
+
+    @traced("query_links")
     def query_links(self, skills):
         """
         Return a FLAT list of dicts like:
         [{'name': 'RepoName', 'link': 'https://github.com/...'}, ...]
         """
+        return [
+            {"name": r["name"], "link": r["link"]}
+            for r in self.query_links_batch([skills])[0]
+        ]
+
+    @traced("query_links_batch")
+    def query_links_batch(self, skills_list: List, n_results: int = None) -> List[List[Dict]]:
+        """
+        Rank the portfolio against many JDs at once.
+        skills_list: one skills input (str or list of skills) per JD
+        n_results: projects to return per JD (default: up to 6)
+        Returns, per JD, [{'name', 'link', 'score'}, ...] best first (score: higher is better).
+        Chroma path (vectors from load_portfolio, else the stored ones): vector candidates from
+        Chroma plus BM25 candidates, re-ranked by
+        semantic_weight * cosine + (1 - semantic_weight) * BM25 / max BM25.
+        Every query text of every JD is embedded and searched in one call.
+        """
+        if not skills_list:
+            return []
+
         # Fallback path when Chroma is unavailable
         if self.collection is None:
-            if isinstance(skills, str):
-                keys = {s.strip().lower() for s in skills.replace("|", ",").split(",") if s.strip()}
-            else:
-                keys = {str(s).strip().lower() for s in (skills or []) if str(s).strip()}
-
-            def score(row):
-                hay = (row.get("Title","") + " " + row.get("Techstack","")).lower()
-                return sum(k in hay for k in keys) if keys else 0
-
-            ranked = sorted(self._fallback_rows, key=score, reverse=True)
-            flat, seen = [], set()
-            for row in ranked[:6]:
-                link = row.get("Links","")
-                if link and link not in seen:
-                    seen.add(link)
-                    title = row.get("Title") or (link.split("/")[-1] if link else "Project")
-                    flat.append({"name": title, "link": link})
-            return flat
-
-        # Normal Chroma path
-        if self.collection.count() == 0:
-            return []
+            if self._fallback_index is None:
+                return [[] for _ in skills_list]
+            k = n_results or 6
+            out = []
+            for skills in skills_list:
+                ranked, seen = [], set()
+                for i, score in self._fallback_index.search(self._query_terms(skills), k):
+                    link = self.table.value("Links", i)
+                    if link and link not in seen:
+                        seen.add(link)
+                        title = self.table.value("Title", i) or link.split("/")[-1]
+                        ranked.append({"name": title, "link": link, "score": round(score, 4)})
+                out.append(ranked)
+            return out
 
-        # Accept str or list for skills
-        if isinstance(skills, str):
-            query_texts = [skills] if skills.strip() else ["software engineering"]
-        else:
-            safe_skills = [s for s in skills if isinstance(s, str) and s.strip()]
-            query_texts = ["; ".join(safe_skills[:10])] + safe_skills[:3] if safe_skills else ["software engineering"]
+        # Hybrid path: candidates from Chroma (vector) + BM25, re-ranked by a fused score
+        if self._vectors is None:
+            self._load_index()  # not loaded in this process: use the stored vectors
+        if not self._projects:
+            return [[] for _ in skills_list]  # nothing indexed
 
-        n_results = min(max(2, len(self.data)), 6) if not self.data.empty else 3
-        out = self.collection.query(query_texts=query_texts, n_results=n_results)
+        # All JDs' query texts (deduplicated) are embedded and searched in one call
+        query_texts, texts_of = [], []
+        position = {}
+        for skills in skills_list:
+            rows = []
+            for text in self._query_texts(skills):
+                if text not in position:
+                    position[text] = len(query_texts)
+                    query_texts.append(text)
+                rows.append(position[text])
+            texts_of.append(rows)
 
-        metas = out.get("metadatas", [])
-        flat, seen = [], set()
-        for group in metas:
-            for m in group:
-                link = (m or {}).get("links")
-                title = (m or {}).get("title") or (link.split("/")[-1] if link else "Project")
-                if link and link not in seen:
-                    seen.add(link)
-                    flat.append({"name": title, "link": link})
-        return flat
+        k = n_results or 6
+        n_docs = len(self._projects)
+        queries = _normalize_rows(np.asarray(self._ef(query_texts), dtype=np.float32))
+        res = self.collection.query(query_embeddings=queries.tolist(), n_results=min(max(2 * k, 10), n_docs),
+                                    include=["distances"])
+        hits = [[self._row_of[pid] for pid in ids if pid in self._row_of] for ids in res.get("ids") or []]
+
+        out = []
+        for skills, rows in zip(skills_list, texts_of):
+            lex_scores = self._lexical.scores(self._query_terms(skills))
+            cand = {i for r in rows for i in hits[r]}
+            cand.update(i for i, score in self._lexical.top(lex_scores, 2 * k) if score > 0)
+            cand = np.fromiter(cand, dtype=np.int64, count=len(cand))
+
+            # Vectorized fusion over the candidates only (vectors are unit-norm already)
+            semantic = np.clip((queries[rows] @ self._vectors[cand].T).max(axis=0), 0.0, None)
+            lex_max = float(lex_scores.max()) if n_docs else 0.0
+            lexical = lex_scores[cand] / lex_max if lex_max > 0 else np.zeros(len(cand), dtype=np.float32)
+            fused = self.semantic_weight * semantic + (1 - self.semantic_weight) * lexical
+
+            order = np.lexsort((cand, -fused))[:k]  # score desc, then portfolio order
+            ranked = []
+            for i, score in zip(cand[order].tolist(), fused[order].tolist()):
+                title, link = self._projects[i]
+                ranked.append({"name": title or link.split("/")[-1], "link": link, "score": round(score, 4)})
+            out.append(ranked)
+        return out
 
     def top_n_fallback(self, n=3):
-        """If vector query returns nothing, just take top-N from DataFrame."""
+        """If vector query returns nothing, just take the first N projects."""
         flat, seen = [], set()
-        for _, row in self.data.head(n).iterrows():
-            link = row["Links"]
+        for title, _, link in self.table.head(n).rows():
             if link and link not in seen:
                 seen.add(link)
-                title = row.get("Title") or (link.split("/")[-1] if link else "Project")
-                flat.append({"name": title, "link": link})
+                flat.append({"name": title or link.split("/")[-1], "link": link})
         return flat
+
+
+# -------------------------------
+# Warm per-tenant portfolios
+# -------------------------------
+class PortfolioRegistry:
+    """
+    Loaded Portfolio per (tenant, portfolio source), least recently used evicted
+    past `max_tenants`. Concurrent first requests for the same key build it once.
+    Manual projects live in one collection per tenant ("form:<tenant>"): a new project
+    list replaces the tenant's previous one and is diffed in place, and the collection
+    is dropped when the tenant is evicted.
+    `stale_owners`: owner prefix of form collections a previous process left behind
+    (e.g. "form:session:"); they are dropped before the first manual-projects build,
+    so an idle registry never touches Chroma.
+    """
+
+    def __init__(self, max_tenants: int = 64, stale_owners: str = None, **portfolio_kwargs):
+        self.max_tenants = max_tenants
+        self.portfolio_kwargs = portfolio_kwargs
+        self._stale_owners = stale_owners
+        self._stale_lock = threading.Lock()
+        self._items = OrderedDict()
+        self._forms = {}  # tenant → key of its current manual-projects portfolio
+        self._building = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(tenant: str, source: Dict) -> Tuple[str, str]:
+        return tenant, hashlib.sha1(json.dumps(source, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _drop_stale(self):
+        """Drop the `stale_owners` collections once; every form build waits for it."""
+        with self._stale_lock:
+            prefix, self._stale_owners = self._stale_owners, None
+            if prefix is None or self.portfolio_kwargs.get("use_chroma") is False:
+                return
+            try:
+                drop_collections(prefix, self.portfolio_kwargs.get("persist_dir", "vectorstore"))
+            except Exception as e:
+                logging.warning(f"Could not clean up old {prefix} collections: {e}")
+
+    def _build(self, tenant: str, source: Dict):
+        if source.get("github"):
+            portfolio = Portfolio.from_github(source["github"], **self.portfolio_kwargs)
+        else:
+            self._drop_stale()
+            rows = source.get("projects") or []
+            portfolio = Portfolio.from_form(rows, owner=f"form:{tenant}", **self.portfolio_kwargs)
+        portfolio.load_portfolio()
+        return portfolio
+
+    def get(self, tenant: str, source: Dict):
+        key = self._key(tenant, source)
+        form = not source.get("github")
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+            # A tenant's manual-project builds share one collection: build them one at a time
+            lock_key = (tenant, "form") if form else key
+            entry = self._hold(lock_key)
+        evicted = []
+        try:
+            with entry[0]:
+                portfolio = self._get_locked(tenant, source, key, form, evicted)
+        finally:
+            self._release(lock_key, entry)
+        # Outside our own build lock: two tenants evicting each other must not deadlock
+        for old_tenant, old, old_entry in evicted:
+            try:
+                with old_entry[0]:
+                    with self._lock:
+                        rebuilt = old_tenant in self._forms  # its collection is in use again
+                    if not rebuilt:
+                        old.drop_collection()  # nobody uses this tenant's manual projects any more
+            finally:
+                self._release((old_tenant, "form"), old_entry)
+        return portfolio
+
+    def _hold(self, lock_key) -> list:
+        """Build lock entry [lock, users] for `lock_key`, one more user (call under self._lock)."""
+        entry = self._building.setdefault(lock_key, [threading.Lock(), 0])
+        entry[1] += 1
+        return entry
+
+    def _release(self, lock_key, entry: list):
+        with self._lock:
+            entry[1] -= 1
+            # Never drop a lock someone may still wait on (a fresh one would let two builds diff
+            # the same collection); a tenant's form lock lives as long as its form portfolio
+            form_tenant = lock_key[0] if lock_key[1] == "form" else None
+            if entry[1] == 0 and form_tenant not in self._forms:
+                self._building.pop(lock_key, None)
+
+    def _get_locked(self, tenant: str, source: Dict, key: Tuple[str, str], form: bool, evicted: List):
+        """`get` with the key's (or the tenant's form) build lock held; evicted forms go to `evicted`."""
+        with self._lock:
+            if key in self._items:
+                return self._items[key]
+        portfolio = self._build(tenant, source)
+        with self._lock:
+            if portfolio.fetch_error:
+                return portfolio  # GitHub failed: don't pin an empty portfolio, retry next time
+            if form:
+                # The previous list's rows were diffed away: its object is stale now
+                self._items.pop(self._forms.get(tenant), None)
+                self._forms[tenant] = key
+            self._items[key] = portfolio
+            while len(self._items) > self.max_tenants:
+                old_key, old = self._items.popitem(last=False)
+                if self._forms.get(old_key[0]) == old_key:
+                    del self._forms[old_key[0]]
+                    # Dropped under that tenant's form lock, so it cannot race a rebuild
+                    evicted.append((old_key[0], old, self._hold((old_key[0], "form"))))
+        return portfolio
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,146 @@
+"""
+Speculative background work for the Streamlit app.
+
+A Prefetcher holds at most one task per kind ("extract", "portfolio", ...),
+keyed by the inputs it was started for. Resubmitting the same key reuses the
+running task; a new key cancels the stale one. A `delay` debounces the task:
+a timer hands it to the executor only once its inputs have been stable that
+long (no pool thread sleeps meanwhile), and `result()` skips the remaining
+delay when the value is needed right away.
+
+    prefetch.submit("extract", jd_text, lambda: chain.extract_jobs(jd_text), delay=0.8)
+    ...
+    job = prefetch.result("extract", jd_text, lambda: chain.extract_jobs(jd_text))
+
+Tasks run on a shared executor and must not call Streamlit APIs. Each one is
+traced on its own (it usually starts before the request that uses it): the first
+`result()` inside a `trace_request` adds its stages there, tagged background=True.
+"""
+import threading
+from concurrent.futures import CancelledError, Executor, Future
+from typing import Callable, Dict, Hashable, Optional
+
+from tracing import Trace, collect, current_trace, merge
+
+
+class _Task:
+    __slots__ = ("key", "fn", "future", "inner", "timer", "cancelled", "trace")
+
+    def __init__(self, key: Hashable, fn: Callable):
+        self.key = key
+        self.fn = fn
+        self.future = Future()  # handed out at once; runs once the debounce timer fires
+        self.inner: Optional[Future] = None  # executor future, once started
+        self.timer: Optional[threading.Timer] = None
+        self.cancelled = False
+        self.trace: Optional[Trace] = None  # stages recorded by fn, until merged into a request
+
+    def run(self):
+        with collect("prefetch") as self.trace:
+            return self.fn()
+
+
+class Prefetcher:
+    """Session-scoped, input-keyed background tasks (one per kind)."""
+
+    def __init__(self, executor: Executor):
+        self._executor = executor
+        self._tasks: Dict[str, _Task] = {}
+        self._lock = threading.RLock()
+        self.hits = 0    # results that were already computed when asked for
+        self.misses = 0  # results computed / awaited at request time
+
+    def _start(self, task: _Task):
+        """Hand the task to the executor (debounce over); no-op if cancelled or already started."""
+        with self._lock:
+            if task.cancelled or task.inner is not None:
+                return
+            if not task.future.set_running_or_notify_cancel():
+                return
+            task.inner = self._executor.submit(task.run)
+        task.inner.add_done_callback(lambda inner: self._finish(task, inner))
+
+    @staticmethod
+    def _finish(task: _Task, inner: Future):
+        if inner.cancelled():
+            task.future.set_exception(CancelledError())
+        elif inner.exception() is not None:
+            task.future.set_exception(inner.exception())
+        else:
+            task.future.set_result(inner.result())
+
+    def submit(self, kind: str, key: Hashable, fn: Callable, delay: float = 0.0) -> Future:
+        """
+        Start `fn` for (kind, key) unless it is already pending / running; cancels a stale key.
+        With a `delay`, a timer (not an executor thread) waits for the inputs to settle.
+        """
+        with self._lock:
+            task = self._tasks.get(kind)
+            if task is not None and task.key == key and not self._failed(task):
+                return task.future
+            if task is not None:
+                self._cancel(task)
+            task = _Task(key, fn)
+            self._tasks[kind] = task
+            if delay:
+                task.timer = threading.Timer(delay, self._start, (task,))
+                task.timer.daemon = True
+                task.timer.start()
+            else:
+                self._start(task)
+            return task.future
+
+    def result(self, kind: str, key: Hashable, fn: Callable, timeout: Optional[float] = None):
+        """Value for (kind, key): the prefetched one if available, else computed now."""
+        future = self.submit(kind, key, fn)
+        with self._lock:
+            task = self._tasks[kind]
+            if future.done():
+                self.hits += 1
+            else:
+                self.misses += 1
+                # Needed now: skip what is left of the debounce
+                if task.timer is not None:
+                    task.timer.cancel()
+                self._start(task)
+        try:
+            return future.result(timeout)
+        finally:
+            self._merge_trace(task)
+
+    def _merge_trace(self, task: _Task):
+        """Add a finished task's stages to the current trace, once (later reuses cost nothing)."""
+        if current_trace() is None:
+            return
+        with self._lock:
+            trace = task.trace if task.future.done() else None
+            task.trace = None if trace is not None else task.trace
+        if trace is not None:
+            merge(trace, background=True)
+
+    def ready(self, kind: str, key: Hashable) -> bool:
+        with self._lock:
+            task = self._tasks.get(kind)
+            return task is not None and task.key == key and task.future.done() and not self._failed(task)
+
+    def cancel(self, kind: str):
+        with self._lock:
+            task = self._tasks.pop(kind, None)
+            if task is not None:
+                self._cancel(task)
+
+    @staticmethod
+    def _cancel(task: _Task):
+        # Debouncing / queued: dropped. Already running: left to finish, its result is never used.
+        task.cancelled = True
+        if task.timer is not None:
+            task.timer.cancel()
+        if task.inner is not None:
+            task.inner.cancel()
+        task.future.cancel()
+
+    @staticmethod
+    def _failed(task: _Task) -> bool:
+        """Failed tasks are retried on the next submit instead of replaying the error."""
+        future = task.future
+        return future.done() and (future.cancelled() or future.exception() is not None)
@@ -0,0 +1,163 @@
+"""
+Compact columnar storage for portfolio rows.
+
+Columns are array-backed, in one of two encodings chosen per column:
+- dictionary: an int32 code per row + one array of distinct (interned) values,
+  so repeated strings such as "Python" or "Jupyter Notebook" are stored once;
+- packed: mostly-unique strings (titles, links) as one UTF-8 buffer + int64
+  offsets, instead of one Python object per row.
+Normalization is vectorized, and `head(n)` is a zero-copy view of the table.
+"""
+import sys
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ("Title", "Techstack", "Links")
+# Columns with more distinct values than this share of rows are packed instead
+DICT_MAX_DISTINCT = 0.5
+
+
+class _DictColumn:
+    __slots__ = ("codes", "values")
+
+    def __init__(self, codes: np.ndarray, values: np.ndarray):
+        self.codes = codes
+        self.values = values
+
+    def __getitem__(self, i: int):
+        return self.values[self.codes[i]]
+
+    def array(self) -> np.ndarray:
+        return self.values[self.codes]
+
+    def head(self, n: int) -> "_DictColumn":
+        return _DictColumn(self.codes[:n], self.values)
+
+    def take(self, ids: np.ndarray) -> "_DictColumn":
+        return _DictColumn(self.codes[ids], self.values)
+
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.values.nbytes + sum(sys.getsizeof(v) for v in self.values)
+
+
+class _PackedColumn:
+    __slots__ = ("offsets", "buffer")
+
+    def __init__(self, offsets: np.ndarray, buffer: bytes):
+        self.offsets = offsets
+        self.buffer = buffer
+
+    @classmethod
+    def pack(cls, strings) -> "_PackedColumn":
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+        return cls(offsets, b"".join(encoded))
+
+    def __getitem__(self, i: int) -> str:
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def array(self) -> np.ndarray:
+        buf, off = self.buffer, self.offsets.tolist()
+        return np.array([buf[a:b].decode("utf-8") for a, b in zip(off, off[1:])], dtype=object)
+
+    def head(self, n: int) -> "_PackedColumn":
+        return _PackedColumn(self.offsets[:n + 1], self.buffer)
+
+    def take(self, ids: np.ndarray) -> "_PackedColumn":
+        return _PackedColumn.pack(self[i] for i in ids.tolist())
+
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + len(self.buffer)
+
+
+class ProjectTable:
+    __slots__ = ("_columns", "_n")
+
+    def __init__(self, columns: Dict[str, object], n: int):
+        self._columns = columns
+        self._n = n
+
+    # -------------------------------
+    # Construction
+    # -------------------------------
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ProjectTable":
+        """Vectorized normalization: required columns added, NaN/None → "", values as str."""
+        columns = {}
+        # (name stored, label in df): extra columns keep their values whatever the label's type
+        labels = [(c, c) for c in COLUMNS] + [(str(c), c) for c in df.columns if c not in COLUMNS]
+        for col, label in labels:
+            series = df[label] if label in df.columns else pd.Series("", index=df.index, dtype=object)
+            text = col in COLUMNS or not pd.api.types.is_numeric_dtype(series)
+            if text:
+                series = series.fillna("").astype(str)
+            codes, uniques = pd.factorize(series, use_na_sentinel=False)
+            if text and len(uniques) > DICT_MAX_DISTINCT * len(series):
+                columns[col] = _PackedColumn.pack(series.tolist())
+            else:
+                values = np.array([sys.intern(u) for u in uniques], dtype=object) if text \
+                    else np.asarray(uniques)
+                columns[col] = _DictColumn(codes.astype(np.int32), values)
+        return cls(columns, len(df))
+
+    @classmethod
+    def from_records(cls, records: Union[Iterable[Dict], Mapping, pd.DataFrame]) -> "ProjectTable":
+        """Rows from a list of dicts, a {column: values} mapping or a DataFrame (as `pd.DataFrame(data)`)."""
+        if isinstance(records, pd.DataFrame):
+            return cls.from_frame(records)
+        if isinstance(records, Mapping):
+            return cls.from_frame(pd.DataFrame(records))
+        return cls.from_frame(pd.DataFrame(list(records)))
+
+    @classmethod
+    def from_csv(cls, path: str) -> "ProjectTable":
+        # Text columns read as str with "" for blanks: no per-row cleanup needed
+        return cls.from_frame(pd.read_csv(path, dtype={c: str for c in COLUMNS}, keep_default_na=False))
+
+    @classmethod
+    def empty(cls) -> "ProjectTable":
+        return cls.from_frame(pd.DataFrame(columns=list(COLUMNS)))
+
+    # -------------------------------
+    # Access
+    # -------------------------------
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def column(self, name: str) -> np.ndarray:
+        """Materialized column as an object (or numeric) array."""
+        return self._columns[name].array()
+
+    def value(self, name: str, i: int):
+        return self._columns[name][i]
+
+    def rows(self, *names: str) -> Iterator[Tuple]:
+        """Tuples of the given columns, row by row (default: Title, Techstack, Links)."""
+        return zip(*(self.column(n) for n in (names or COLUMNS)))
+
+    def head(self, n: int) -> "ProjectTable":
+        """First n rows as views over the same arrays / buffers (no copy)."""
+        n = max(0, min(n, self._n))
+        return ProjectTable({c: col.head(n) for c, col in self._columns.items()}, n)
+
+    def take(self, ids) -> "ProjectTable":
+        ids = np.asarray(ids, dtype=np.int64)
+        return ProjectTable({c: col.take(ids) for c, col in self._columns.items()}, len(ids))
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({c: self.column(c) for c in self._columns})
+
+    def to_records(self) -> List[Dict]:
+        cols = self.columns
+        return [dict(zip(cols, row)) for row in zip(*(self.column(c).tolist() for c in cols))]
+
+    def nbytes(self) -> int:
+        """Approximate footprint of the arrays, buffers and distinct values."""
+        return sum(col.nbytes() for col in self._columns.values())
@@ -0,0 +1,129 @@
+"""
+Prompt compaction / token budgeting for pasted job descriptions.
+
+Pasted JDs are often mostly boilerplate (benefits, EEO statements, company
+history). `compact_jd` removes repeated lines and boilerplate sentences; only
+when the text is over budget does it drop those sections and then keep
+requirement / skills / responsibility sections first, trimming the rest:
+
+    c = compact_jd(jd_text, budget=800)
+    c.text, c.tokens_before, c.tokens_after, c.saved
+
+Token counts are estimated locally (~4 characters per token for English text
+on Llama-style tokenizers); no tokenizer is loaded.
+"""
+import re
+from dataclasses import dataclass
+from typing import List
+
+CHARS_PER_TOKEN = 4
+DEFAULT_JD_BUDGET = 1200
+
+# Section headings whose content never helps extraction / the email
+_DROP_HEADING_RE = re.compile(
+    r"^(?:benefits|perks|(?:perks|benefits) (?:and|&) (?:benefits|perks)|what we offer|why join us|why work (?:with|for) us|"
+    r"about (?:us|the company|our company|the team|our team)|who we are|our (?:story|mission|values|culture)|company overview|"
+    r"equal (?:employment )?opportunity|eeo(?: statement)?|diversity(?: (?:and|&) inclusion)?|"
+    r"privacy(?: notice| policy)?|how to apply|application process|disclaimer|legal)(?=\s|$)",
+    re.IGNORECASE,
+)
+# Section headings to keep in full when truncating
+_KEEP_HEADING_RE = re.compile(
+    r"^(?:requirements?|qualifications?|(?:required|preferred|technical|key) (?:skills|qualifications)|skills|"
+    r"must[- ]haves?|nice[- ]to[- ]haves?|good to have|responsibilities|key responsibilities|"
+    r"what you(?:'ll| will) (?:do|bring|need)|what we(?:'re| are) looking for|you (?:have|bring)|"
+    r"experience|tech(?:nology)? stack|about (?:you|the (?:role|job|position))|the role|role|"
+    r"job (?:title|summary))\b",
+    re.IGNORECASE,
+)
+# Boilerplate sentences that show up outside of a heading
+_BOILERPLATE_LINE_RE = re.compile(
+    r"equal opportunity employer|without regard to (?:race|age|gender)|reasonable accommodations?|"
+    r"e-?verify|protected veteran|we (?:do not|don't) accept unsolicited|click apply|apply now",
+    re.IGNORECASE,
+)
+_BULLET_RE = re.compile(r"^[\s\-•*·–>#]+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass
+class Compacted:
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def _heading(line: str) -> str:
+    """Heading text if the line looks like a section heading, else ""."""
+    bare = _BULLET_RE.sub("", line).strip().rstrip(":").strip("*_ ")
+    if not bare or len(bare) > 60:
+        return ""
+    if line.rstrip().endswith(":") or line.lstrip().startswith("#") or bare.isupper():
+        return bare
+    # Unmarked heading: a short line that is exactly a known section name ("Benefits", "About the role"),
+    # not one that merely starts with it ("Privacy-first platform team", "Legal Operations Analyst")
+    if len(bare.split()) <= 4 and (_DROP_HEADING_RE.fullmatch(bare) or _KEEP_HEADING_RE.fullmatch(bare)):
+        return bare
+    return ""
+
+
+def _sections(text: str, drop: bool = True):
+    """
+    (line, priority) for every kept line; priority 0 = keep first, 2 = trim first.
+    With `drop`, lines under boilerplate headings are left out.
+    """
+    out, seen = [], set()
+    section = 1  # lines before the first heading (role, short intro)
+    for raw in text.splitlines():
+        line = " ".join(raw.split())
+        if not line:
+            continue
+        # The first line is usually the job title, never a section heading
+        heading = _heading(line) if out else ""
+        if heading:
+            if _KEEP_HEADING_RE.match(heading):
+                section = 0
+            elif drop and _DROP_HEADING_RE.match(heading):
+                section = None
+            else:
+                section = 2
+        if section is None or _BOILERPLATE_LINE_RE.search(line):
+            continue
+        norm = _BULLET_RE.sub("", line).lower()
+        if norm in seen:
+            continue
+        seen.add(norm)
+        out.append((line, 0 if not out else section))
+    return out
+
+
+def compact_jd(text: str, budget: int = DEFAULT_JD_BUDGET) -> Compacted:
+    """Strip boilerplate, dedupe lines, then fit `budget` tokens keeping the key sections."""
+    before = estimate_tokens(text)
+    # Boilerplate sections are only dropped when needed: a short JD is sent (deduped) as is
+    lines = _sections(text or "", drop=before > budget)
+    if not lines and (text or "").strip():
+        # Everything looked like boilerplate: better to send a trimmed JD than nothing
+        lines = [(" ".join(text.split()), 0)]
+
+    keep: List[bool] = [False] * len(lines)
+    remaining = budget * CHARS_PER_TOKEN
+    for priority in (0, 1, 2):
+        for i, (line, p) in enumerate(lines):
+            if p == priority and len(line) + 1 <= remaining:
+                keep[i] = True
+                remaining -= len(line) + 1
+
+    kept = [line for (line, _), k in zip(lines, keep) if k]
+    if not kept and lines:
+        # A single huge line (JD pasted without newlines): hard cut at a word boundary
+        kept = [lines[0][0][:budget * CHARS_PER_TOKEN].rsplit(" ", 1)[0]]
+    compact = "\n".join(kept)
+    return Compacted(compact, before, estimate_tokens(compact))
@@ -0,0 +1,77 @@
+import re
+from typing import List, Iterable, Tuple
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; keeps tech names like c++, c#, node.js intact."""
+    return [t.rstrip(".") for t in TOKEN_RE.findall((text or "").lower())]
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over short documents (project title + techstack).
+    Built once; each query is a handful of vectorized NumPy adds over the
+    postings of its terms, followed by argpartition top-k selection.
+    Ties are broken by document order, so rankings are deterministic.
+    """
+
+    def __init__(self, docs: Iterable[str], k1: float = 1.2, b: float = 0.75):
+        tokenized = [tokenize(d) for d in docs]
+        self.n_docs = len(tokenized)
+        lengths = np.fromiter((len(t) for t in tokenized), dtype=np.float32, count=self.n_docs)
+        avg_len = float(lengths.mean()) if self.n_docs and lengths.sum() else 1.0
+
+        # term -> {doc_id: tf}
+        postings = {}
+        for doc_id, tokens in enumerate(tokenized):
+            for tok in tokens:
+                tf = postings.setdefault(tok, {})
+                tf[doc_id] = tf.get(doc_id, 0) + 1
+
+        # term -> (doc_ids, precomputed BM25 weights)
+        self._postings = {}
+        norm = k1 * (1 - b + b * lengths / avg_len)
+        for tok, tf_map in postings.items():
+            ids = np.fromiter(tf_map.keys(), dtype=np.int32, count=len(tf_map))
+            tf = np.fromiter(tf_map.values(), dtype=np.float32, count=len(tf_map))
+            idf = np.log(1 + (self.n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            self._postings[tok] = (ids, (idf * tf * (k1 + 1) / (tf + norm[ids])).astype(np.float32))
+
+    def scores(self, terms: Iterable[str]) -> np.ndarray:
+        """BM25 score of every document for a bag of query terms."""
+        out = np.zeros(self.n_docs, dtype=np.float32)
+        for tok in set(terms):
+            hit = self._postings.get(tok)
+            if hit is not None:
+                out[hit[0]] += hit[1]
+        return out
+
+    def top_k(self, terms: Iterable[str], k: int) -> List[int]:
+        """Document ids of the k best matches (score desc, then document order)."""
+        return [doc_id for doc_id, _ in self.search(terms, k)]
+
+    def search(self, terms: Iterable[str], k: int) -> List[Tuple[int, float]]:
+        """(document id, BM25 score) of the k best matches (score desc, then document order)."""
+        return self.top(self.scores(terms), k)
+
+    def top(self, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """(document id, score) of the k highest of precomputed `scores` (ties in document order)."""
+        k = min(k, self.n_docs)
+        if k <= 0:
+            return []
+        if k < self.n_docs:
+            cand = np.argpartition(-scores, k - 1)[:k]
+            # argpartition is arbitrary among equal scores at the cut: widen to all ties
+            cand = np.union1d(cand, np.flatnonzero(scores == scores[cand].min()))
+        else:
+            cand = np.arange(self.n_docs)
+        order = np.lexsort((cand, -scores[cand]))
+        top = cand[order][:k]
+        return list(zip(top.tolist(), scores[top].tolist()))
+
+    def top_k_batch(self, queries: List[Iterable[str]], k: int) -> List[List[int]]:
+        return [self.top_k(terms, k) for terms in queries]
@@ -0,0 +1,84 @@
+"""
+Per-task model routing.
+
+Each LLM task (the trace label) runs on a model tier: the small, fast model for
+JD field extraction and project bullets, the large one for the recruiter email
+and for repairs. Output that fails validation on a smaller tier is redone on
+FALLBACK_TIER. Tiers and routes can be changed per Chain or from the environment:
+
+    RESUMATCH_MODEL_SMALL=llama-3.1-8b-instant
+    RESUMATCH_MODEL_LARGE=llama-3.3-70b-versatile
+    RESUMATCH_MODEL_ROUTES="extract_jobs=large,project_bullets=small"
+
+TierStats keeps calls / latency / tokens / estimated cost per tier.
+"""
+import os
+import threading
+from typing import Dict, Tuple
+
+MODEL_TIERS = {
+    "small": "llama-3.1-8b-instant",
+    "large": "llama-3.3-70b-versatile",
+}
+FALLBACK_TIER = "large"
+
+# Task (trace label) → tier; unlisted tasks use FALLBACK_TIER
+TASK_TIERS = {
+    "extract_jobs": "small",
+    "extract_repair": "large",
+    "project_bullets": "small",
+    "write_mail": "large",
+}
+
+# USD per 1M (input, output) tokens, Groq on-demand pricing
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+}
+
+
+def model_tiers() -> Dict[str, str]:
+    """MODEL_TIERS with RESUMATCH_MODEL_<TIER> overrides."""
+    return {tier: os.getenv(f"RESUMATCH_MODEL_{tier.upper()}", model) for tier, model in MODEL_TIERS.items()}
+
+
+def task_tiers() -> Dict[str, str]:
+    """TASK_TIERS with RESUMATCH_MODEL_ROUTES ("task=tier,...") overrides."""
+    routes = dict(TASK_TIERS)
+    for item in os.getenv("RESUMATCH_MODEL_ROUTES", "").split(","):
+        task, _, tier = item.partition("=")
+        if task.strip() and tier.strip():
+            routes[task.strip()] = tier.strip()
+    return routes
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost of one call (0 for models without a known price)."""
+    price_in, price_out = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+
+class TierStats:
+    """Thread-safe per-tier counters: LLM calls, cache hits, fallbacks, latency, tokens, cost."""
+
+    _FIELDS = ("calls", "cache_hits", "fallbacks", "ms", "prompt_tokens", "completion_tokens", "cost_usd")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tiers: Dict[str, Dict[str, float]] = {}
+
+    def add(self, tier: str, **counts):
+        with self._lock:
+            stats = self._tiers.setdefault(tier, dict.fromkeys(self._FIELDS, 0))
+            for name, value in counts.items():
+                stats[name] += value
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Copy of the counters, plus avg_ms per LLM call."""
+        with self._lock:
+            out = {tier: dict(stats) for tier, stats in self._tiers.items()}
+        for stats in out.values():
+            stats["avg_ms"] = round(stats["ms"] / stats["calls"], 3) if stats["calls"] else 0.0
+            stats["ms"] = round(stats["ms"], 3)
+            stats["cost_usd"] = round(stats["cost_usd"], 6)
+        return out
@@ -0,0 +1,361 @@
+"""
+HTTP service mode: Chain + Portfolio behind a small JSON API (stdlib only).
+
+    python service.py --port 8000 --workers 8 --queue 32
+
+Endpoints (POST, JSON body):
+    /extract  {"jd"}                                   → {"jobs": [...]}
+    /match    {"skills" | "jd", <portfolio>, "n"}      → {"links": [...]}
+    /email    {"jd" | "job", <portfolio>, "name", "background", "email"}
+                                                       → {"job", "links", "email"}
+    /resume   same as /email                           → .docx bytes
+    GET /healthz                                       → pool / tenant stats (tenants: thread mode only)
+<portfolio> is {"github": "username"} or {"projects": [{"Title", "Techstack", "Links"}, ...]}.
+The tenant comes from the X-Tenant header (or "tenant" in the body).
+Bodies over --max-body bytes are answered 413; a GitHub portfolio that could not
+be fetched (rate limit, unknown user) is answered 502 with the reason.
+
+Requests are handed to a bounded worker pool (threads, or processes with
+--processes). When all workers are busy and the queue is full the service
+answers 429 with Retry-After instead of piling up requests, so a load balancer
+can spread users over several nodes. Each tenant's portfolio index is kept warm
+in memory (LRU over --tenants); with --processes each worker ranks its own
+copy in memory (BM25) instead of sharing the Chroma store.
+"""
+import json
+import argparse
+import logging
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Tuple
+
+from portfolio import PortfolioRegistry
+from tracing import trace_request
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+STREAM_CHUNK = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024  # JDs + project lists are small; larger bodies get 413
+
+
+class BadRequest(ValueError):
+    """Invalid request payload (→ 400)."""
+
+
+class UpstreamError(RuntimeError):
+    """The portfolio source (GitHub) failed, e.g. rate limited or unknown user (→ 502)."""
+
+
+class Saturated(RuntimeError):
+    """All workers busy and the queue is full (→ 429)."""
+
+
+# -------------------------------
+# Per-process state (shared by all threads of a worker process)
+# -------------------------------
+_state = {}
+_state_lock = threading.Lock()
+
+
+def configure(chain=None, registry: PortfolioRegistry = None):
+    """Set the Chain / registry used by the handlers (defaults are built on first use)."""
+    with _state_lock:
+        if chain is not None:
+            _state["chain"] = chain
+        if registry is not None:
+            _state["registry"] = registry
+
+
+def _chain():
+    with _state_lock:
+        if "chain" not in _state:
+            from chain import Chain
+            _state["chain"] = Chain()
+        return _state["chain"]
+
+
+def _registry() -> PortfolioRegistry:
+    with _state_lock:
+        if "registry" not in _state:
+            _state["registry"] = PortfolioRegistry()
+        return _state["registry"]
+
+
+def _init_worker(max_tenants: int):
+    """
+    ProcessPoolExecutor initializer: every worker process keeps its own warm registry.
+    Its portfolios are ranked in memory: a Chroma PersistentClient is not safe to share
+    across processes, and one worker evicting a tenant would drop a collection the others use.
+    """
+    _state["registry"] = PortfolioRegistry(max_tenants, use_chroma=False)
+
+
+# -------------------------------
+# Handlers (run inside the worker pool; plain dicts in, picklable results out)
+# -------------------------------
+def _jd(payload: Dict) -> str:
+    jd = payload.get("jd")
+    if not isinstance(jd, str) or not jd.strip():
+        raise BadRequest("'jd' (non-empty string) is required")
+    return jd
+
+
+def _source(payload: Dict) -> Dict:
+    if payload.get("github"):
+        return {"github": str(payload["github"]).strip()}
+    projects = payload.get("projects")
+    if projects is not None and not isinstance(projects, list):
+        raise BadRequest("'projects' must be a list")
+    return {"projects": projects or []}
+
+
+def _count(payload: Dict, name: str):
+    """Optional positive integer field (None if absent)."""
+    value = payload.get(name)
+    if value is None:
+        return None
+    try:
+        count = 0 if isinstance(value, bool) else int(value)
+    except (TypeError, ValueError):
+        count = 0
+    if count < 1:
+        raise BadRequest(f"'{name}' must be a positive integer")
+    return count
+
+
+def _links(payload: Dict, skills) -> List[Dict]:
+    portfolio = _registry().get(payload.get("tenant") or "default", _source(payload))
+    if portfolio.fetch_error:
+        # Not an empty portfolio: say so instead of answering with no / generic links
+        raise UpstreamError(portfolio.fetch_error)
+    links = portfolio.query_links(skills)
+    return links or portfolio.top_n_fallback(n=3)
+
+
+def _job_and_links(payload: Dict) -> Tuple[Dict, List[Dict]]:
+    job = payload.get("job")
+    if job is None:
+        jd = _jd(payload)
+        job = _chain().extract_jobs(jd)[0]
+    elif not isinstance(job, dict):
+        raise BadRequest("'job' must be an object")
+    return job, _links(payload, job.get("skills") or payload.get("jd") or "")
+
+
+def handle_extract(payload: Dict) -> Dict:
+    jd = _jd(payload)
+    return {"jobs": _chain().extract_jobs(jd)}
+
+
+def handle_match(payload: Dict) -> Dict:
+    skills = payload.get("skills") or _jd(payload)
+    n = _count(payload, "n")
+    links = _links(payload, skills)
+    return {"links": links[:n or len(links)]}
+
+
+def handle_email(payload: Dict) -> Dict:
+    job, links = _job_and_links(payload)
+    email = _chain().write_mail(job, links, payload.get("name", ""), payload.get("background", ""),
+                                payload.get("email", ""))
+    return {"job": job, "links": links, "email": email}
+
+
+def handle_resume(payload: Dict) -> bytes:
+    job, links = _job_and_links(payload)
+    return _chain().render_resume(job, payload.get("name", ""), payload.get("background", ""),
+                                  payload.get("email", ""), links)
+
+
+ROUTES: Dict[str, Callable[[Dict], object]] = {
+    "/extract": handle_extract,
+    "/match": handle_match,
+    "/email": handle_email,
+    "/resume": handle_resume,
+}
+
+
+def run_job(path: str, payload: Dict):
+    """Worker entry point (module level so process pools can pickle it)."""
+    with trace_request("service", endpoint=path, tenant=payload.get("tenant")):
+        return ROUTES[path](payload)
+
+
+# -------------------------------
+# Bounded worker pool
+# -------------------------------
+class WorkerPool:
+    """
+    Thread (or process) pool that accepts at most `workers + queue_size` jobs at once;
+    `submit` raises Saturated instead of queueing more.
+    """
+
+    def __init__(self, workers: int = 4, queue_size: int = 16, processes: bool = False,
+                 max_tenants: int = 64):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.processes = processes
+        if processes:
+            self._executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(max_tenants,))
+        else:
+            self._executor = ThreadPoolExecutor(workers, thread_name_prefix="resumatch-worker")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise Saturated("server busy, retry later")
+        with self._lock:
+            self.in_flight += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"workers": self.workers, "queue_size": self.queue_size,
+                    "in_flight": self.in_flight, "rejected": self.rejected}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+# -------------------------------
+# HTTP layer
+# -------------------------------
+class ServiceHandler(BaseHTTPRequestHandler):
+    server_version = "ResuMatch/1.0"
+    protocol_version = "HTTP/1.1"  # keep-alive for clients sending several requests
+
+    def _send_json(self, status: int, body: Dict, headers: Dict = None):
+        data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_docx(self, data: bytes):
+        self.send_response(200)
+        self.send_header("Content-Type", DOCX_MIME)
+        self.send_header("Content-Disposition", 'attachment; filename="Resume.docx"')
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        view = memoryview(data)
+        for i in range(0, len(view), STREAM_CHUNK):
+            self.wfile.write(view[i:i + STREAM_CHUNK])
+
+    def do_GET(self):
+        if self.path != "/healthz":
+            return self._send_json(404, {"error": "not found"})
+        body = {"status": "ok", **self.server.pool.stats()}
+        if not self.server.pool.processes:
+            # Worker processes keep their own registries; this process' one is not theirs
+            body["tenants"] = len(_registry())
+        self._send_json(200, body)
+
+    def do_POST(self):
+        if self.path not in ROUTES:
+            return self._send_json(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError("negative Content-Length")
+        except ValueError as e:
+            self.close_connection = True  # the body is left unread
+            return self._send_json(400, {"error": f"invalid Content-Length: {e}"}, {"Connection": "close"})
+        if length > self.server.max_body:
+            self.close_connection = True
+            return self._send_json(413, {"error": f"body larger than {self.server.max_body} bytes"},
+                                   {"Connection": "close"})
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("body must be a JSON object")
+        except ValueError as e:
+            return self._send_json(400, {"error": f"invalid JSON: {e}"})
+        payload["tenant"] = self.headers.get("X-Tenant") or payload.get("tenant") or "default"
+
+        try:
+            future = self.server.pool.submit(run_job, self.path, payload)
+        except Saturated as e:
+            return self._send_json(429, {"error": str(e)}, {"Retry-After": str(self.server.retry_after)})
+        try:
+            result = future.result(timeout=self.server.job_timeout)
+        except TimeoutError:
+            return self._send_json(504, {"error": "job timed out"})
+        except BadRequest as e:
+            return self._send_json(400, {"error": str(e)})
+        except UpstreamError as e:
+            return self._send_json(502, {"error": str(e)})
+        except Exception as e:
+            logging.exception(f"{self.path} failed")
+            return self._send_json(500, {"error": str(e)})
+
+        if isinstance(result, bytes):
+            self._send_docx(result)
+        else:
+            self._send_json(200, result)
+
+    def log_message(self, fmt, *args):
+        logging.info("%s - %s", self.address_string(), fmt % args)
+
+
+class ServiceServer(ThreadingHTTPServer):
+    """HTTP front end: connection threads only parse / wait; the work runs in `pool`."""
+
+    daemon_threads = True
+
+    def __init__(self, address, pool: WorkerPool, job_timeout: float = 120, retry_after: int = 2,
+                 max_body: int = MAX_BODY_BYTES):
+        super().__init__(address, ServiceHandler)
+        self.pool = pool
+        self.job_timeout = job_timeout
+        self.retry_after = retry_after
+        self.max_body = max_body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ResuMatch HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent jobs")
+    parser.add_argument("--queue", type=int, default=16, help="Jobs waiting for a worker before 429s")
+    parser.add_argument("--processes", action="store_true",
+                        help="Worker processes instead of threads (in-memory ranking, no Chroma)")
+    parser.add_argument("--tenants", type=int, default=64, help="Warm portfolios kept in memory")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-job timeout (seconds)")
+    parser.add_argument("--max-body", type=int, default=MAX_BODY_BYTES, help="Largest request body (bytes)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    configure(registry=PortfolioRegistry(args.tenants))
+    pool = WorkerPool(args.workers, args.queue, processes=args.processes, max_tenants=args.tenants)
+    server = ServiceServer((args.host, args.port), pool, job_timeout=args.timeout, max_body=args.max_body)
+    logging.info(f"Serving on http://{args.host}:{args.port} ({args.workers} workers, queue {args.queue})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
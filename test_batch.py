@@ -0,0 +1,38 @@
+import json
+import tempfile
+
+from batch import read_jds
+
+
+def test_read_jds_skips_records_without_text_jd(caplog):
+    lines = [{"id": "a", "jd": "AI Engineer, Python"}, {"id": "b", "jd": {"text": "nested"}},
+             {"id": "c", "description": ["not", "text"]}, [1, 2], {"id": "d", "jd": "  "}]
+    with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+        f.write("\n".join(json.dumps(line) for line in lines) + "\n\n")
+        f.write('{"id": "e", "jd": "truncated\n')  # e.g. a half-written line
+        f.write(json.dumps({"id": "f", "jd": "Data Engineer, SQL"}) + "\n")
+    assert [r["id"] for r in read_jds(f.name)] == ["a", "f"]
+    assert len(caplog.records) == 5
+
+
+def test_sync_and_async_pipelines_agree():
+    import argparse
+    import asyncio
+
+    from batch import aprocess_jd, process_jd
+    from benchmark import FakeLLM
+    from cache import ResponseCache
+    from chain import Chain
+    from portfolio import Portfolio
+
+    chain = Chain(cache=ResponseCache(f"{tempfile.mkdtemp()}/llm.sqlite"), llm=FakeLLM(latency=0.0))
+    portfolio = Portfolio(data=[{"Title": "chat-rag", "Techstack": "Python, LangChain",
+                                 "Links": "https://github.com/u/chat-rag"}], use_chroma=False)
+    portfolio.load_portfolio()
+    args = argparse.Namespace(email=True, resume=True, resume_dir=tempfile.mkdtemp(), name="Ada", background="",
+                              user_email="ada@example.com", trace=False)
+    item = {"id": "job/1", "jd": "AI Engineer with 2+ years of Python, LangChain and SQL"}
+    result = process_jd(chain, portfolio, item, args)
+    assert result["links"][0]["name"] == "chat-rag" and result["email"]
+    assert result["resume"].endswith("job_1_Resume.docx")
+    assert asyncio.run(aprocess_jd(chain, portfolio, item, args)) == result
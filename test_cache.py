@@ -0,0 +1,57 @@
+import tempfile
+
+import pytest
+
+from cache import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        self.now += 1  # every call is a distinct moment, so LRU order is well defined
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("cache.time.time", clock)
+    return clock
+
+
+def make_cache(**kwargs) -> ResponseCache:
+    return ResponseCache(f"{tempfile.mkdtemp()}/llm.sqlite", **kwargs)
+
+
+def test_hit_and_miss_counters(clock):
+    cache = make_cache()
+    key = cache.make_key("model", "template {x}", {"x": 1})
+    assert key == cache.make_key("model", "template {x}", {"x": 1})
+    assert key != cache.make_key("model", "template {x}", {"x": 2})
+    assert cache.get(key) is None
+    cache.set(key, "answer")
+    assert cache.get(key) == "answer" and cache.get(key) == "answer"
+    assert cache.stats() == {"hits": 2, "misses": 1, "size": 1}
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = make_cache(ttl=60)
+    cache.set("k", "v")
+    clock.now += 30
+    assert cache.get("k") == "v"
+    clock.now += 60  # expiry counts from creation, not from the last read
+    assert cache.get("k") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 0}
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = make_cache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # "b" is now the least recently used
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats()["size"] == 2
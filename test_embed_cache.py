@@ -0,0 +1,39 @@
+import os
+import tempfile
+
+from embed_cache import EmbeddingCache, CachedEmbeddingFunction
+
+
+class CountingEmbedding:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, input):
+        self.calls.append(list(input))
+        return [[float(len(t)), 1.0] for t in input]
+
+
+def test_only_misses_are_embedded():
+    cache = EmbeddingCache(os.path.join(tempfile.mkdtemp(), "emb.sqlite"))
+    inner = CountingEmbedding()
+    fn = CachedEmbeddingFunction(inner, cache)
+
+    assert fn(["Python", "Go", "Python"]) == [[6.0, 1.0], [2.0, 1.0], [6.0, 1.0]]
+    assert inner.calls == [["Python", "Go"]]
+
+    # A second function over the same cache (e.g. another collection) reuses the vectors
+    again = CachedEmbeddingFunction(CountingEmbedding(), cache, model_id=fn.model_id)
+    assert again(["Go", "Rust"]) == [[2.0, 1.0], [4.0, 1.0]]
+    assert again.embedding_function.calls == [["Rust"]]
+
+
+def test_lru_eviction():
+    cache = EmbeddingCache(os.path.join(tempfile.mkdtemp(), "emb.sqlite"), max_entries=2)
+    fn = CachedEmbeddingFunction(CountingEmbedding(), cache)
+    fn(["a"])
+    fn(["b"])
+    fn(["a"])  # touch "a": "b" is now the least recently used
+    fn(["c"])
+    assert cache.stats()["size"] == 2
+    keys = [cache.make_key(fn.model_id, t) for t in ("a", "b", "c")]
+    assert sorted(cache.get_many(keys)) == sorted([keys[0], keys[2]])
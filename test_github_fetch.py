@@ -0,0 +1,124 @@
+import json
+import asyncio
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from github_fetch import GitHubFetcher, GitHubError
+
+# Local stub of the GitHub repos endpoint: 3 pages, ETags, rate-limit headers
+PAGES = {
+    n: [{"name": f"repo{n}{i}", "language": "Python", "topics": ["nlp"],
+         "html_url": f"https://github.com/octo/repo{n}{i}", "stargazers_count": i}
+        for i in range(2)]
+    for n in (1, 2, 3)
+}
+hits = []
+
+
+class Stub(BaseHTTPRequestHandler):
+    def do_GET(self):
+        user, _, query = self.path.partition("?")
+        page = int(dict(p.split("=") for p in query.split("&")).get("page", 1))
+        etag = f'"p{page}"'
+        hits.append((user, page, self.headers.get("If-None-Match")))
+
+        if user.endswith("/busy/repos") and sum(h[0] == user for h in hits) == 1:
+            # secondary rate limit on the first request only
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        if user.endswith("/limited/repos"):
+            self.send_response(403)
+            self.send_header("X-RateLimit-Remaining", "0")
+            self.send_header("X-RateLimit-Reset", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = json.dumps(PAGES[page]).encode()
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Link", f'<{base}{user}?per_page=100&page=3>; rel="last"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+base = f"http://127.0.0.1:{server.server_port}"
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def test_pagination_and_warm_cache():
+    cache_dir = tempfile.mkdtemp()
+    fetcher = GitHubFetcher(cache_dir=cache_dir, base_url=base)
+    rows = fetcher.fetch_projects("octo")
+    assert [r["Title"] for r in rows] == ["repo10", "repo11", "repo20", "repo21", "repo30", "repo31"]
+    assert rows[0]["Techstack"] == "Python, nlp"
+
+    # Within the TTL: no network at all
+    hits.clear()
+    assert len(GitHubFetcher(cache_dir=cache_dir, base_url=base).fetch_projects("octo")) == 6
+    assert hits == []
+
+
+def test_conditional_requests_after_ttl():
+    cache_dir = tempfile.mkdtemp()
+    GitHubFetcher(cache_dir=cache_dir, base_url=base).fetch_repos("octo")
+    hits.clear()
+    repos = GitHubFetcher(cache_dir=cache_dir, base_url=base, ttl=0).fetch_repos("octo")
+    assert len(repos) == 6
+    assert sorted(h[2] for h in hits) == ['"p1"', '"p2"', '"p3"']
+
+
+def test_rate_limit_is_surfaced():
+    fetcher = GitHubFetcher(cache_dir=tempfile.mkdtemp(), base_url=base)
+    try:
+        fetcher.fetch_repos("limited")
+    except GitHubError as e:
+        assert "rate limit" in str(e)
+        assert fetcher.rate_limit["remaining"] == "0"
+    else:
+        raise AssertionError("expected GitHubError")
+
+
+def test_async_fetch_matches_sync():
+    fetcher = GitHubFetcher(cache_dir=tempfile.mkdtemp(), base_url=base)
+
+    async def fetch():
+        try:
+            return await fetcher.afetch_projects("octo")
+        finally:
+            await fetcher.aclose()
+
+    rows = asyncio.run(fetch())
+    assert [r["Title"] for r in rows] == ["repo10", "repo11", "repo20", "repo21", "repo30", "repo31"]
+
+
+def test_secondary_rate_limit_is_retried():
+    hits.clear()
+    fetcher = GitHubFetcher(cache_dir=tempfile.mkdtemp(), base_url=base)
+    assert len(fetcher.fetch_repos("busy")) == 6
+    assert [h[1] for h in hits[:2]] == [1, 1]
+
+
+def test_one_async_client_per_event_loop():
+    fetcher = GitHubFetcher(cache_dir=tempfile.mkdtemp(), base_url=base)
+    clients = []
+
+    async def use():
+        clients.append(fetcher._async_client()[0])
+        assert fetcher._async_client()[0] is clients[-1]
+        await fetcher.aclose()
+
+    asyncio.run(use())
+    asyncio.run(use())
+    assert clients[0] is not clients[1] and all(c.is_closed for c in clients)
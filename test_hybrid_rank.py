@@ -0,0 +1,123 @@
+import tempfile
+
+from benchmark import FakeEmbedding
+from portfolio import Portfolio
+
+ROWS = [
+    {"Title": "chat-rag", "Techstack": "Python", "Links": "https://github.com/u/chat-rag",
+     "Description": "RAG chatbot with LangChain and ChromaDB"},
+    {"Title": "stock-ml", "Techstack": "Python", "Links": "https://github.com/u/stock-ml",
+     "Description": "Price forecasting with pandas"},
+    {"Title": "shop", "Techstack": "TypeScript, React", "Links": "https://github.com/u/shop"},
+]
+
+
+class CountingEmbedding(FakeEmbedding):
+    def __init__(self):
+        super().__init__()
+        self.texts = 0
+
+    def __call__(self, input):
+        self.texts += len(input)
+        return super().__call__(input)
+
+
+def portfolio(persist_dir, embed):
+    p = Portfolio(data=ROWS, owner="hybrid-test", persist_dir=persist_dir,
+                  embedding_function=embed, embedding_cache=False)
+    p.load_portfolio()
+    return p
+
+
+def test_description_breaks_language_ties():
+    p = portfolio(tempfile.mkdtemp(), FakeEmbedding())
+    ranked = p.query_links_batch([["Python", "LangChain"], ["React"]])
+    assert ranked[0][0]["link"] == "https://github.com/u/chat-rag"
+    assert ranked[1][0]["link"] == "https://github.com/u/shop"
+    scores = [r["score"] for r in ranked[0]]
+    assert scores == sorted(scores, reverse=True) and scores[0] > scores[1]
+
+
+def test_reload_reuses_stored_vectors():
+    persist_dir = tempfile.mkdtemp()
+    portfolio(persist_dir, CountingEmbedding())
+    embed = CountingEmbedding()
+    p = portfolio(persist_dir, embed)
+    assert embed.texts == 0  # unchanged rows: vectors come back from Chroma
+    assert p.query_links(["Python", "LangChain"])[0]["name"] == "chat-rag"
+
+
+def test_persisted_collection_is_queried_without_load():
+    persist_dir = tempfile.mkdtemp()
+    portfolio(persist_dir, FakeEmbedding())
+    embed = CountingEmbedding()
+    p = Portfolio(data=ROWS, owner="hybrid-test", persist_dir=persist_dir,
+                  embedding_function=embed, embedding_cache=False)
+    ranked = p.query_links_batch([["Python", "LangChain"]])[0]
+    assert ranked[0]["link"] == "https://github.com/u/chat-rag" and len(ranked) == 3
+    assert embed.texts == 3  # the query texts only, stored vectors are reused
+
+
+def test_form_edits_are_diffed_into_one_collection_per_tenant():
+    from portfolio import PortfolioRegistry, chroma_client
+
+    persist_dir, embed = tempfile.mkdtemp(), CountingEmbedding()
+    registry = PortfolioRegistry(max_tenants=1, persist_dir=persist_dir, embedding_function=embed,
+                                 embedding_cache=False)
+    registry.get("alice", {"projects": ROWS[:2]})
+    p = registry.get("alice", {"projects": ROWS})
+    assert embed.texts == 3  # only the added project was embedded
+    assert len(registry) == 1 and len(p.query_links_batch([["React"]])[0]) == 3
+    assert len(chroma_client(persist_dir).list_collections()) == 1
+
+    # Evicting alice drops her collection
+    registry.get("bob", {"projects": ROWS[2:]})
+    owners = [c.metadata["owner"] for c in chroma_client(persist_dir).list_collections()]
+    assert owners == ["form:bob"]
+
+
+def test_stale_session_collections_are_dropped_on_first_form_build():
+    from portfolio import PortfolioRegistry, chroma_client
+
+    persist_dir, embed = tempfile.mkdtemp(), CountingEmbedding()
+    kwargs = dict(persist_dir=persist_dir, embedding_function=embed, embedding_cache=False)
+    PortfolioRegistry(**kwargs).get("session:old", {"projects": ROWS[:1]})
+
+    registry = PortfolioRegistry(stale_owners="form:session:", **kwargs)
+    assert len(chroma_client(persist_dir).list_collections()) == 1  # idle registry: left alone
+    registry.get("session:new", {"projects": ROWS[1:]})
+    registry.get("session:other", {"projects": ROWS[:1]})
+    owners = sorted(c.metadata["owner"] for c in chroma_client(persist_dir).list_collections())
+    assert owners == ["form:session:new", "form:session:other"]
+
+
+def test_form_builds_of_a_tenant_never_overlap(monkeypatch):
+    import threading
+    import time
+
+    from portfolio import PortfolioRegistry
+
+    registry = PortfolioRegistry(use_chroma=False)
+    build = registry._build
+    active, overlaps = [0], []
+
+    def slow_build(tenant, source):
+        active[0] += 1
+        overlaps.append(active[0])
+        time.sleep(0.02)
+        try:
+            return build(tenant, source)
+        finally:
+            active[0] -= 1
+
+    monkeypatch.setattr(registry, "_build", slow_build)
+    # Staggered requests: later ones arrive while earlier ones wait on (or just released) the lock
+    threads = [threading.Thread(target=registry.get, args=("alice", {"projects": ROWS[:i % 3 + 1]}))
+               for i in range(9)]
+    for t in threads:
+        t.start()
+        time.sleep(0.005)
+    for t in threads:
+        t.join()
+    assert max(overlaps) == 1
+    assert list(registry._building) == [("alice", "form")]  # kept while alice has a form portfolio
@@ -0,0 +1,51 @@
+import os
+import sys
+import json
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Cold-start budget: importing the core modules must not pull in these
+HEAVY = ["streamlit", "langchain_groq", "langchain_core", "docx", "chromadb", "requests"]
+BUDGET_S = 1.0
+
+
+def import_in_fresh_interpreter(code: str):
+    script = (
+        "import sys, time, json\n"
+        "t0 = time.perf_counter()\n"
+        f"{code}\n"
+        "elapsed = time.perf_counter() - t0\n"
+        f"print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {HEAVY!r} if m in sys.modules]}}))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", script], cwd=HERE, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_chain_import_is_light():
+    res = import_in_fresh_interpreter("import chain")
+    assert res["loaded"] == []
+    assert res["elapsed"] < BUDGET_S
+
+
+def test_portfolio_import_is_light():
+    res = import_in_fresh_interpreter("import portfolio")
+    assert res["loaded"] == []
+    assert res["elapsed"] < BUDGET_S
+
+
+def test_portfolio_without_query_skips_chromadb():
+    res = import_in_fresh_interpreter(
+        "import portfolio\n"
+        "p = portfolio.Portfolio(data=[{'Title': 'a', 'Techstack': 'Python', 'Links': 'https://x'}])"
+    )
+    assert "chromadb" not in res["loaded"]
+
+
+def test_first_page_load_skips_chromadb():
+    # A fresh session with no GitHub username / manual projects has nothing to index
+    res = import_in_fresh_interpreter(
+        "from streamlit.testing.v1 import AppTest\n"
+        "AppTest.from_file('main.py', default_timeout=30).run()"
+    )
+    assert "chromadb" not in res["loaded"]
@@ -0,0 +1,65 @@
+from jd_parser import JobPosting, parse_jd, missing_fields, merge
+
+JD = """
+We are looking for an AI Engineer with 0–2 years of experience.
+The ideal candidate should have strong skills in Python, NLP, and Large Language Models (LLMs).
+Hands-on experience with LangChain, Vector Databases (like ChromaDB or FAISS), and Streamlit is preferred.
+"""
+
+
+def test_local_parse_finds_required_fields():
+    job = parse_jd(JD)
+    assert job["role"] == "AI Engineer"
+    assert job["experience"] == "0-2 years"
+    assert job["skills"][:3] == ["Python", "NLP", "LLMs"]
+    assert "ChromaDB" in job["skills"] and "JavaScript" not in job["skills"]
+    assert missing_fields(job) == []
+
+
+def test_labelled_title_and_open_ended_years():
+    job = parse_jd("Job Title: Senior Backend Developer\nRequirements: 5+ yrs Go, C++, Kubernetes")
+    assert job["role"] == "Senior Backend Developer"
+    assert job["experience"] == "5+ years"
+    assert job["skills"] == ["Go", "C++", "Kubernetes"]
+
+
+def test_missing_fields_and_merge():
+    local = parse_jd("Make great coffee at our cafe.")
+    assert missing_fields(local) == ["role", "skills"]
+    merged = merge(local, {"role": "Barista", "skills": "coffee, latte art"}, ["role", "skills"])
+    job = JobPosting.validate(merged)
+    assert job.role == "Barista" and job.skills == ["coffee", "latte art"]
+
+
+def test_schema_rejects_bad_output():
+    for bad in ([], {"skills": ["x"]}, {"role": "x", "skills": 3}):
+        try:
+            JobPosting.validate(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {bad!r}")
+
+
+BARISTA_JD = """
+Barista – Downtown Cafe
+Position: Remote (US) or on-site
+Our family has been serving coffee for 10 years.
+You will react quickly to guests, excel at latte art and keep the machines free of rust.
+Go the extra mile and spark joy in every cup! Pour 350 ml drinks. Send your CV to jobs@cafe.com.
+"""
+
+
+def test_non_tech_jd_is_left_to_the_llm():
+    job = parse_jd(BARISTA_JD)
+    assert job["skills"] == []
+    assert job["role"] == ""
+    assert job["experience"] == ""
+    assert missing_fields(job) == ["role", "skills"]
+
+
+def test_ambiguous_skills_need_tech_context():
+    job = parse_jd("Role: Data Engineer\nStack: Python, Spark, Git, Excel and SQL. Excel at teamwork.")
+    assert job["role"] == "Data Engineer"
+    assert job["skills"] == ["Python", "Spark", "Git", "Excel", "SQL"]
+    # A couple of skills is not enough to skip the LLM
+    assert missing_fields(parse_jd("Role: Data Engineer\nPython and SQL")) == ["skills"]
@@ -0,0 +1,158 @@
+import tempfile
+
+import pytest
+
+from benchmark import FakeLLM
+from cache import ResponseCache
+from chain import Chain
+from routing import call_cost, model_tiers, task_tiers
+
+LLM_JD = "Join our cafe team and make great coffee"  # nothing for the local parser → LLM extraction
+
+
+class SloppyLLM(FakeLLM):
+    """Small model that answers with a preamble instead of JSON / bullets."""
+
+    def _answer(self, prompt: str) -> str:
+        return "Sure! Here is what you asked for:"
+
+
+def make_chain(small=None, **kwargs) -> Chain:
+    llms = {"small": small or FakeLLM(latency=0.0), "large": FakeLLM(latency=0.0)}
+    return Chain(cache=ResponseCache(f"{tempfile.mkdtemp()}/llm.sqlite"), llms=llms, **kwargs)
+
+
+def test_tasks_are_routed_to_their_tier():
+    chain = make_chain()
+    job = chain.extract_jobs(LLM_JD)[0]
+    chain.write_mail(job, [], "Ada", "Student", "ada@example.com")
+    stats = chain.model_stats()
+    assert stats["small"]["calls"] == 1 and stats["small"]["model"] == model_tiers()["small"]
+    assert stats["large"]["calls"] == 1
+    assert stats["large"]["cost_usd"] > stats["small"]["cost_usd"] > 0
+
+
+def test_invalid_extraction_falls_back_to_large_model():
+    chain = make_chain(small=SloppyLLM(latency=0.0))
+    job = chain.extract_jobs(LLM_JD)[0]
+    assert job["role"] == "AI Engineer"
+    stats = chain.model_stats()
+    assert stats["small"]["fallbacks"] == 1
+    assert stats["large"]["calls"] == 1
+
+
+def test_invalid_bullets_fall_back_to_large_model():
+    chain = make_chain(small=SloppyLLM(latency=0.0))
+    bullets = chain._project_bullets([{"name": "a", "link": "https://x/a"}, {"name": "b", "link": "https://x/b"}])
+    assert bullets[0] == ["Built an end-to-end pipeline.", "Cut latency by 40% with caching."]
+    assert chain.model_stats()["small"]["fallbacks"] == 2
+
+
+def test_single_client_never_falls_back():
+    chain = Chain(cache=ResponseCache(f"{tempfile.mkdtemp()}/llm.sqlite"), llm=FakeLLM(latency=0.0))
+    assert not chain._can_fall_back("small")
+
+
+def test_routes_from_env_and_kwargs(monkeypatch):
+    monkeypatch.setenv("RESUMATCH_MODEL_ROUTES", "write_mail=small, extract_jobs=large")
+    monkeypatch.setenv("RESUMATCH_MODEL_SMALL", "tiny-model")
+    assert task_tiers()["write_mail"] == "small" and task_tiers()["extract_jobs"] == "large"
+    chain = make_chain(routes={"project_bullets": "large"})
+    assert chain.models["small"] == "tiny-model"
+    assert chain._tier("write_mail") == "small" and chain._tier("project_bullets") == "large"
+    assert chain._tier("unknown_task") == "large"
+
+
+def test_call_cost():
+    assert call_cost("llama-3.3-70b-versatile", 1_000_000, 0) == pytest.approx(0.59)
+    assert call_cost("unknown-model", 1000, 1000) == 0.0
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FlakyLLM(FakeLLM):
+    """Rate-limits the first call for project 'b' only; counts calls per project."""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = messages[-1].content
+        name = "b" if "'b'" in prompt else "a"
+        CALLS[name] = CALLS.get(name, 0) + 1
+        if name == "b" and CALLS[name] == 1:
+            raise RateLimitError("slow down")
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+
+CALLS = {}
+
+
+def test_rate_limited_batch_item_is_retried_alone(monkeypatch):
+    monkeypatch.setattr("utils.backoff_delay", lambda *a, **k: 0.0)
+    CALLS.clear()
+    chain = make_chain(small=FlakyLLM(latency=0.0))
+    bullets = chain._project_bullets([{"name": "a", "link": "https://x/a"}, {"name": "b", "link": "https://x/b"}])
+    assert len(bullets) == 2
+    assert CALLS == {"a": 1, "b": 2}  # 'a' succeeded the first time and was not re-sent
+
+
+def test_failed_extraction_is_not_cached():
+    chain = Chain(cache=ResponseCache(f"{tempfile.mkdtemp()}/llm.sqlite"), llm=SloppyLLM(latency=0.0))
+    with pytest.raises(ValueError):
+        chain.extract_jobs(LLM_JD)
+    assert chain.cache.stats()["size"] == 0  # the next attempt asks the model again
+
+
+def test_valid_extraction_is_cached():
+    chain = make_chain()
+    chain.extract_jobs(LLM_JD)
+    chain.extract_jobs(LLM_JD)
+    assert chain.cache.stats()["size"] == 1 and chain.model_stats()["small"]["calls"] == 1
+
+
+def test_tier_without_model_name_falls_back():
+    chain = make_chain(routes={"write_mail": "medium"})
+    chain.llms["medium"] = FakeLLM(latency=0.0)  # a client, but no RESUMATCH_MODEL_MEDIUM
+    assert chain._tier("write_mail") == "large"
+    job = chain.extract_jobs(LLM_JD)[0]
+    assert chain.write_mail(job, [], "Ada", "Student", "ada@example.com")
+
+
+def test_invalid_small_output_is_not_cached():
+    chain = make_chain(small=SloppyLLM(latency=0.0))
+    projects = [{"name": "a", "link": "https://x/a"}]
+    first = chain._project_bullets(projects)
+    assert chain._project_bullets(projects) == first
+    assert chain.cache.stats()["size"] == 1  # only the large tier's answer
+    stats = chain.model_stats()
+    # The repeat is served from the large tier's cache: no second small call, no second fallback
+    assert stats["small"]["calls"] == 1 and stats["small"]["fallbacks"] == 1
+    assert stats["large"]["calls"] == 1 and stats["large"]["cache_hits"] == 1
+
+
+def test_repeated_extraction_after_fallback_is_free():
+    chain = make_chain(small=SloppyLLM(latency=0.0))
+    job = chain.extract_jobs(LLM_JD)
+    assert chain.extract_jobs(LLM_JD) == job
+    stats = chain.model_stats()
+    assert stats["small"]["calls"] == 1 and stats["large"]["calls"] == 1 and stats["large"]["cache_hits"] == 1
+
+
+def test_async_api_runs_the_same_flow():
+    import asyncio
+
+    projects = [{"name": "a", "link": "https://x/a"}, {"name": "b", "link": "https://x/b"}]
+
+    def sync(chain):
+        job = chain.extract_jobs(LLM_JD)[0]
+        return job, chain.write_mail(job, [], "Ada", "Student", "ada@example.com"), chain._project_bullets(projects)
+
+    async def run_async(chain):
+        job = (await chain.aextract_jobs(LLM_JD))[0]
+        return (job, await chain.awrite_mail(job, [], "Ada", "Student", "ada@example.com"),
+                await chain._aproject_bullets(projects))
+
+    sync_chain, async_chain = make_chain(small=SloppyLLM(latency=0.0)), make_chain(small=SloppyLLM(latency=0.0))
+    assert asyncio.run(run_async(async_chain)) == sync(sync_chain)
+    strip = lambda stats: {t: {k: v for k, v in s.items() if k not in ("ms", "avg_ms")} for t, s in stats.items()}
+    assert strip(async_chain.model_stats()) == strip(sync_chain.model_stats())
@@ -0,0 +1,97 @@
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import pytest
+
+from prefetch import Prefetcher
+from tracing import stage, trace_request
+
+
+@pytest.fixture
+def prefetch():
+    executor = ThreadPoolExecutor(max_workers=4)
+    yield Prefetcher(executor)
+    executor.shutdown(wait=True, cancel_futures=True)
+
+
+def test_same_key_reuses_the_running_task(prefetch):
+    calls = []
+    fn = lambda: calls.append(1) or "job"
+    first = prefetch.submit("extract", "jd-1", fn)
+    second = prefetch.submit("extract", "jd-1", fn)
+    assert first is second
+    first.result(timeout=1)
+    assert prefetch.result("extract", "jd-1", fn) == "job"
+    assert calls == [1]
+    assert prefetch.hits == 1
+
+
+def test_new_key_cancels_the_debounced_stale_task(prefetch):
+    calls = []
+    stale = prefetch.submit("extract", "old", lambda: calls.append("old"), delay=5)
+    prefetch.submit("extract", "new", lambda: calls.append("new") or "new")
+    assert prefetch.result("extract", "new", lambda: "unused") == "new"
+    with pytest.raises(CancelledError):
+        stale.result(timeout=1)
+    assert calls == ["new"]
+
+
+def test_result_skips_the_rest_of_the_debounce(prefetch):
+    prefetch.submit("extract", "jd", lambda: "job", delay=5)
+    t0 = time.perf_counter()
+    assert prefetch.result("extract", "jd", lambda: "unused", timeout=2) == "job"
+    assert time.perf_counter() - t0 < 1
+    assert prefetch.misses == 1
+
+
+def test_failed_task_is_retried(prefetch):
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("rate limited")
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        prefetch.result("portfolio", "octocat", flaky)
+    assert not prefetch.ready("portfolio", "octocat")
+    assert prefetch.result("portfolio", "octocat", flaky) == "ok"
+    assert prefetch.ready("portfolio", "octocat")
+
+
+def test_running_stale_result_is_not_returned(prefetch):
+    release = threading.Event()
+    prefetch.submit("portfolio", "alice", lambda: release.wait(2) and "alice")
+    prefetch.submit("portfolio", "bob", lambda: "bob")
+    release.set()
+    assert prefetch.result("portfolio", "bob", lambda: "unused") == "bob"
+
+
+def test_debounce_does_not_hold_a_pool_thread():
+    executor = ThreadPoolExecutor(max_workers=1)
+    prefetch = Prefetcher(executor)
+    prefetch.submit("extract", "jd", lambda: "job", delay=5)
+    # The only worker is free while the JD debounce is pending
+    assert prefetch.submit("portfolio", "octocat", lambda: "portfolio").result(timeout=1) == "portfolio"
+    prefetch.cancel("extract")
+    executor.shutdown(wait=True)
+
+
+def test_background_stages_reach_the_request_trace(prefetch):
+    def extract():
+        with stage("llm_extract", prompt_tokens=120, cache_hit=False):
+            return "job"
+
+    # Started before the request, outside any trace (as on an earlier Streamlit rerun)
+    prefetch.submit("extract", "jd", extract).result(timeout=1)
+    with trace_request("streamlit") as trace:
+        assert prefetch.result("extract", "jd", extract) == "job"
+    with trace_request("streamlit") as again:
+        assert prefetch.result("extract", "jd", extract) == "job"
+
+    assert [s["stage"] for s in trace.stages] == ["llm_extract"]
+    assert trace.stages[0]["background"] is True
+    assert trace.to_dict()["prompt_tokens"] == 120
+    assert again.stages == []  # reused result: its work is not counted twice
@@ -0,0 +1,66 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from project_table import ProjectTable
+
+ROWS = [
+    {"Title": f"repo-{i}", "Techstack": "Python, nlp" if i % 2 else "Go", "Links": f"https://github.com/u/repo-{i}",
+     "Stars": i}
+    for i in range(10)
+]
+
+
+def test_round_trip_and_encodings():
+    table = ProjectTable.from_records(ROWS)
+    assert len(table) == 10 and table.columns == ["Title", "Techstack", "Links", "Stars"]
+    assert table.to_records() == ROWS
+    # Repeated techstacks are stored once, unique titles are packed
+    assert type(table._columns["Techstack"]).__name__ == "_DictColumn"
+    assert type(table._columns["Title"]).__name__ == "_PackedColumn"
+    assert table.value("Links", 7) == "https://github.com/u/repo-7"
+
+
+def test_head_is_a_view():
+    table = ProjectTable.from_records(ROWS)
+    head = table.head(3)
+    assert [r["Title"] for r in head.to_records()] == ["repo-0", "repo-1", "repo-2"]
+    assert np.shares_memory(head._columns["Techstack"].codes, table._columns["Techstack"].codes)
+    assert head._columns["Title"].buffer is table._columns["Title"].buffer
+    assert [r["Title"] for r in table.take([9, 0]).to_records()] == ["repo-9", "repo-0"]
+
+
+def test_csv_normalization():
+    path = os.path.join(tempfile.mkdtemp(), "p.csv")
+    pd.DataFrame([{"Title": "a", "Links": "https://x"}, {"Title": None, "Links": None}]).to_csv(path, index=False)
+    table = ProjectTable.from_csv(path)
+    assert table.to_records() == [{"Title": "a", "Techstack": "", "Links": "https://x"},
+                                  {"Title": "", "Techstack": "", "Links": ""}]
+
+
+def test_portfolio_frame_is_cached_until_the_table_changes():
+    from portfolio import Portfolio
+
+    p = Portfolio(data=ROWS, use_chroma=False)
+    frame = p.data
+    assert p.data is frame and len(frame) == 10
+    p.table = p.table.head(3)
+    assert p.data is not frame and len(p.data) == 3
+
+
+def test_column_mappings_frames_and_non_str_labels():
+    columns = {"Title": ["a", "b"], "Techstack": ["Go", "Rust"], "Links": ["https://x/a", "https://x/b"]}
+    table = ProjectTable.from_records(columns)
+    assert list(table.rows()) == [("a", "Go", "https://x/a"), ("b", "Rust", "https://x/b")]
+    assert ProjectTable.from_records(pd.DataFrame(columns)).to_records() == table.to_records()
+
+    table = ProjectTable.from_frame(pd.DataFrame({**columns, 2024: [1, 2]}))
+    assert table.column("2024").tolist() == [1, 2]
+
+    from portfolio import Portfolio
+
+    for data in (columns, pd.DataFrame(columns)):
+        assert Portfolio(data=data, use_chroma=False).table.to_records() == \
+            ProjectTable.from_records(columns).to_records()
@@ -0,0 +1,73 @@
+from prompt_budget import compact_jd, estimate_tokens
+
+JD = """Senior Data Engineer
+
+About Us
+We were founded in a garage and our story spans five continents.
+
+Responsibilities:
+- Build batch and streaming pipelines with Spark and Python.
+- Own data quality.
+- Build batch and streaming pipelines with Spark and Python.
+
+Requirements
+- 5+ years of experience with SQL and Python
+
+Benefits:
+- Unlimited PTO
+
+Acme is an equal opportunity employer.
+"""
+
+
+def test_boilerplate_and_duplicates_are_removed():
+    c = compact_jd(JD, budget=estimate_tokens(JD) - 1)
+    assert "garage" not in c.text and "PTO" not in c.text and "equal opportunity" not in c.text
+    assert c.text.count("streaming pipelines") == 1
+    assert "5+ years of experience with SQL" in c.text
+    assert c.saved == c.tokens_before - c.tokens_after > 0
+
+
+def test_budget_keeps_title_and_requirements_first():
+    jd = JD + "\nTeam\n" + "\n".join(f"Filler line number {i} about the team." for i in range(200))
+    c = compact_jd(jd, budget=60)
+    assert c.tokens_after <= 60
+    assert c.text.startswith("Senior Data Engineer")
+    assert "5+ years of experience with SQL" in c.text
+    assert "Filler line number 199" not in c.text
+
+
+def test_single_long_line_is_cut():
+    c = compact_jd("python " * 1000, budget=50)
+    assert 0 < c.tokens_after <= 50
+    assert estimate_tokens("") == 0
+
+
+def test_about_you_section_is_kept():
+    jd = ("Backend Engineer\n\nAbout Us:\nWe sell shoes online.\n\n"
+          "About You:\n- 3+ years of Go and PostgreSQL\n- Comfortable with Kubernetes\n")
+    c = compact_jd(jd, budget=estimate_tokens(jd) - 1)
+    assert "We sell shoes" not in c.text
+    assert "3+ years of Go and PostgreSQL" in c.text and "Kubernetes" in c.text
+
+
+def test_under_budget_jd_keeps_its_sections():
+    c = compact_jd(JD)
+    assert "garage" in c.text and "PTO" in c.text
+    assert "equal opportunity" not in c.text and c.text.count("streaming pipelines") == 1
+
+
+def test_lines_starting_with_a_drop_word_are_not_headings():
+    jd = ("Senior Backend Engineer\nWe build payments infrastructure.\nPrivacy-first platform team\n"
+          "- 5+ years of Python and Go\n- Kubernetes, Kafka, PostgreSQL")
+    assert compact_jd(jd).text == jd
+    # Over budget (a real benefits section to drop): the requirements still survive
+    c = compact_jd(jd + "\nBenefits:\n" + "- Free lunch and a gym membership\n" * 30, budget=60)
+    assert c.text == jd
+
+
+def test_first_line_is_never_a_heading():
+    jd = "Legal Operations Analyst\nSupport contract reviews for the sales team.\nRequirements:\n- 3 years"
+    assert compact_jd(jd).text == jd
+    c = compact_jd(jd + "\nAbout Us:\n" + "We were founded in a garage.\n" * 30, budget=60)
+    assert c.text == jd
@@ -0,0 +1,20 @@
+from ranking import LexicalIndex, tokenize
+
+docs = ["chatbot Python, LangChain", "web JavaScript", "cv Python, OpenCV", "engine C++"]
+index = LexicalIndex(docs)
+
+
+def test_tokenize_keeps_tech_names():
+    assert tokenize("Python, C++ and Node.js.") == ["python", "c++", "and", "node.js"]
+
+
+def test_bm25_ordering():
+    # Both terms beat one; the rarer term ("opencv") outweighs the common one ("python")
+    assert index.top_k(tokenize("python opencv"), 2) == [2, 0]
+    scores = index.scores(tokenize("python opencv"))
+    assert scores[2] > scores[0] > 0 and scores[1] == scores[3] == 0
+
+
+def test_ties_keep_document_order():
+    assert index.top_k(tokenize("c++"), 4) == [3, 0, 1, 2]
+    assert index.top_k_batch([tokenize("python"), tokenize("javascript")], 2) == [[0, 2], [1, 0]]
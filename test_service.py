@@ -0,0 +1,145 @@
+import json
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict
+
+from benchmark import FakeLLM
+from cache import ResponseCache
+from chain import Chain
+import service
+from service import PortfolioRegistry, ServiceServer, WorkerPool
+
+PROJECTS = [
+    {"Title": "chat-rag", "Techstack": "Python, LangChain, ChromaDB", "Links": "https://github.com/u/chat-rag"},
+    {"Title": "shop-ui", "Techstack": "React, TypeScript", "Links": "https://github.com/u/shop-ui"},
+]
+JD = "We are looking for an AI Engineer with 1+ years of experience in Python and LangChain."
+
+service.configure(
+    chain=Chain(cache=ResponseCache(f"{tempfile.mkdtemp()}/llm.sqlite"), llm=FakeLLM(latency=0.0)),
+    registry=PortfolioRegistry(use_chroma=False),
+)
+
+
+def start(pool):
+    server = ServiceServer(("127.0.0.1", 0), pool, retry_after=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def post(url, body, tenant="acme"):
+    req = urllib.request.Request(url, data=json.dumps(body).encode(), method="POST",
+                                 headers={"Content-Type": "application/json", "X-Tenant": tenant})
+    with urllib.request.urlopen(req) as r:
+        return r.status, r.headers, r.read()
+
+
+def test_endpoints():
+    server, base = start(WorkerPool(workers=2, queue_size=2))
+    try:
+        status, _, body = post(f"{base}/extract", {"jd": JD})
+        assert status == 200 and json.loads(body)["jobs"][0]["role"] == "AI Engineer"
+
+        status, _, body = post(f"{base}/match", {"skills": ["LangChain"], "projects": PROJECTS, "n": 1})
+        assert json.loads(body)["links"] == [{"name": "chat-rag", "link": "https://github.com/u/chat-rag"}]
+
+        status, _, body = post(f"{base}/email", {"jd": JD, "projects": PROJECTS, "name": "A"})
+        assert json.loads(body)["email"].startswith("Dear Hiring Manager")
+
+        status, headers, body = post(f"{base}/resume", {"jd": JD, "projects": PROJECTS})
+        assert headers["Content-Type"].startswith("application/vnd.openxmlformats") and body[:2] == b"PK"
+
+        # Same tenant + projects: the portfolio index stayed warm
+        assert len(service._registry()) == 1
+
+        try:
+            post(f"{base}/extract", {})
+        except urllib.error.HTTPError as e:
+            assert e.code == 400
+        else:
+            raise AssertionError("expected 400")
+    finally:
+        server.shutdown()
+
+
+def test_backpressure():
+    pool = WorkerPool(workers=1, queue_size=0)
+    release = threading.Event()
+    pool.submit(release.wait)  # the only worker is busy
+    server, base = start(pool)
+    try:
+        post(f"{base}/extract", {"jd": JD})
+    except urllib.error.HTTPError as e:
+        assert e.code == 429 and e.headers["Retry-After"] == "1"
+    else:
+        raise AssertionError("expected 429")
+    finally:
+        release.set()
+        server.shutdown()
+    time.sleep(0.05)
+    assert pool.stats()["in_flight"] == 0 and pool.stats()["rejected"] == 1
+
+
+def status_of(url, data: bytes, headers: Dict = None) -> int:
+    req = urllib.request.Request(url, data=data, method="POST", headers=headers or {})
+    try:
+        with urllib.request.urlopen(req) as r:
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_bad_input_is_rejected_not_crashed():
+    pool = WorkerPool(workers=1, queue_size=1)
+    server = ServiceServer(("127.0.0.1", 0), pool, max_body=1024)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        for n in ("abc", 0, [1], True):
+            body = json.dumps({"skills": ["LangChain"], "projects": PROJECTS, "n": n}).encode()
+            assert status_of(f"{base}/match", body) == 400
+        assert status_of(f"{base}/extract", json.dumps({"jd": "x" * 2048}).encode()) == 413
+
+        with urllib.request.urlopen(f"{base}/healthz") as r:
+            assert "tenants" in json.loads(r.read())
+        server.pool = WorkerPool(workers=1, queue_size=0, processes=True)
+        with urllib.request.urlopen(f"{base}/healthz") as r:
+            assert "tenants" not in json.loads(r.read())  # the parent's registry is not the workers'
+        server.pool.shutdown()
+    finally:
+        server.shutdown()
+        pool.shutdown()
+
+
+def test_worker_processes_do_not_share_chroma():
+    pool = WorkerPool(workers=1, queue_size=0, processes=True)
+    try:
+        assert pool.submit(_worker_uses_chroma).result(timeout=60) is False
+    finally:
+        pool.shutdown()
+
+
+def _worker_uses_chroma():
+    return service._registry().portfolio_kwargs.get("use_chroma", True)
+
+
+class RateLimitedFetcher:
+    def fetch_projects(self, username):
+        from github_fetch import GitHubError
+        raise GitHubError("GitHub rate limit exceeded, resets at 12:00.", 403)
+
+
+def test_github_failure_is_reported(monkeypatch):
+    monkeypatch.setattr("portfolio.github_fetcher", lambda: RateLimitedFetcher())
+    server, base = start(WorkerPool(workers=1, queue_size=1))
+    try:
+        post(f"{base}/match", {"skills": ["Python"], "github": "octocat"})
+    except urllib.error.HTTPError as e:
+        assert e.code == 502 and "rate limit" in json.loads(e.read())["error"]
+    else:
+        raise AssertionError("expected 502")
+    finally:
+        server.shutdown()
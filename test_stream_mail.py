@@ -0,0 +1,59 @@
+import asyncio
+import tempfile
+import time
+
+from benchmark import FakeLLM
+from cache import ResponseCache
+from chain import Chain
+
+JOB = {"role": "AI Engineer", "experience": "1+ years", "skills": ["Python", "LangChain"], "description": ""}
+LINKS = [{"name": "chat-rag", "link": "https://github.com/u/chat-rag"}]
+MAIL_ARGS = (JOB, LINKS, "Ada", "AI/ML student", "ada@example.com")
+
+
+class MailLLM(FakeLLM):
+    """Answers with an email long enough to pass the mail check (so it is cached)."""
+
+    def _answer(self, prompt: str) -> str:
+        return ("Dear Hiring Manager, I am writing to apply for the AI Engineer role. I have built "
+                "retrieval pipelines with Python and LangChain and would love to discuss how I can help. "
+                "Best regards, Ada")
+
+
+def make_chain(latency: float = 0.0) -> Chain:
+    return Chain(cache=ResponseCache(f"{tempfile.mkdtemp()}/llm.sqlite"), llm=MailLLM(latency=latency))
+
+
+def timed_chunks(chunks):
+    t0, out = time.perf_counter(), []
+    for chunk in chunks:
+        out.append((time.perf_counter() - t0, chunk))
+    return out
+
+
+def test_chunks_arrive_incrementally_and_match_write_mail():
+    chain = make_chain(latency=0.3)
+    chunks = timed_chunks(chain.stream_mail(*MAIL_ARGS))
+    assert len(chunks) > 10
+    # The first words are shown while the rest (0.3 s spread over the words) is still generated
+    assert chunks[-1][0] - chunks[0][0] > 0.2
+    streamed = "".join(chunk for _, chunk in chunks)
+    assert streamed == make_chain().write_mail(*MAIL_ARGS)
+
+
+def test_cached_answer_is_one_chunk():
+    chain = make_chain()
+    streamed = "".join(chain.stream_mail(*MAIL_ARGS))
+    assert list(chain.stream_mail(*MAIL_ARGS)) == [streamed]
+    assert chain.write_mail(*MAIL_ARGS) == streamed  # same cache entry as the non-streaming call
+    assert chain.model_stats()["large"]["calls"] == 1
+
+
+def test_astream_mail_matches_stream_mail():
+    async def collect(chain):
+        return [chunk async for chunk in chain.astream_mail(*MAIL_ARGS)]
+
+    chain = make_chain()
+    chunks = asyncio.run(collect(chain))
+    assert len(chunks) > 10 and "".join(chunks) == "".join(make_chain().stream_mail(*MAIL_ARGS))
+    assert asyncio.run(collect(chain)) == ["".join(chunks)]
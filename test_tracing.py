@@ -0,0 +1,64 @@
+import json
+import tempfile
+from types import SimpleNamespace
+
+from tracing import JsonlSink, current_trace, record, stage, token_usage, trace_request, traced
+
+
+@traced("double")
+def double(x):
+    return 2 * x
+
+
+def test_stages_and_totals():
+    with trace_request("email", user="ada") as trace:
+        assert current_trace() is trace
+        with stage("extract_jobs") as rec:
+            rec.update(cache_hit=False, prompt_tokens=100, completion_tokens=20, cost_usd=0.0001)
+        record("project_bullets", 5.0, cache_hit=True)
+        record("compact_prompt", 0.1, tokens_saved=30)
+        assert double(2) == 4
+    assert current_trace() is None
+
+    d = trace.to_dict()
+    assert [s["stage"] for s in d["stages"]] == ["extract_jobs", "project_bullets", "compact_prompt", "double"]
+    assert d["name"] == "email" and d["user"] == "ada" and d["total_ms"] >= 0
+    assert (d["prompt_tokens"], d["completion_tokens"]) == (100, 20)
+    assert (d["llm_calls"], d["cache_hits"], d["tokens_saved"]) == (1, 1, 30)
+    assert d["cost_usd"] == 0.0001
+
+
+def test_no_op_without_a_trace():
+    with stage("extract_jobs") as rec:
+        assert rec is None
+    record("write_mail", 1.0, cache_hit=True)  # nowhere to go, no error
+    assert double(3) == 6 and current_trace() is None
+
+
+def test_nested_traces_restore_the_outer_one():
+    with trace_request("outer") as outer:
+        with trace_request("inner") as inner:
+            record("a", 1.0)
+        record("b", 1.0)
+    assert [s["stage"] for s in inner.stages] == ["a"]
+    assert [s["stage"] for s in outer.stages] == ["b"]
+
+
+def test_jsonl_sink_appends_finished_traces():
+    path = f"{tempfile.mkdtemp()}/traces.jsonl"
+    sink = JsonlSink(path)
+    for name in ("one", "two"):
+        with trace_request(name, sink=sink):
+            record("stage", 1.5, prompt_tokens=7)
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [t["name"] for t in lines] == ["one", "two"]
+    assert lines[0]["prompt_tokens"] == 7 and lines[0]["stages"][0]["ms"] == 1.5
+    assert lines[0]["total_ms"] is not None and lines[0]["id"] != lines[1]["id"]
+
+
+def test_token_usage_sources():
+    assert token_usage(SimpleNamespace(usage_metadata={"input_tokens": 3, "output_tokens": 4})) == (3, 4)
+    legacy = SimpleNamespace(response_metadata={"token_usage": {"prompt_tokens": 5, "completion_tokens": 6}})
+    assert token_usage(legacy) == (5, 6)
+    assert token_usage(object()) == (0, 0)
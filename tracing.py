@@ -0,0 +1,161 @@
+"""
+Per-request tracing: wall time, LLM token usage and cache hits for every stage.
+
+    with trace_request("email") as trace:
+        job = chain.extract_jobs(jd)
+        links = portfolio.query_links(job["skills"])
+    trace.to_dict()  # {"id", "name", "total_ms", "prompt_tokens", ..., "stages": [...]}
+
+Stages are recorded only while a trace is active (a single ContextVar lookup
+otherwise). Finished traces are appended to a JSON-lines file when
+RESUMATCH_TRACE_FILE is set, or to the `sink` passed to trace_request.
+"""
+import os
+import json
+import time
+import uuid
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+_current = contextvars.ContextVar("resumatch_trace", default=None)
+
+
+class Trace:
+    """Structured record of one request (one generation / one batch JD)."""
+
+    def __init__(self, name: str, **meta):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.meta = meta
+        self.started = time.time()
+        self.total_ms = None
+        self.stages = []
+        self._t0 = time.perf_counter()
+
+    def add(self, stage: str, ms: float, **fields):
+        self.stages.append({"stage": stage, "ms": round(ms, 3), **fields})
+
+    def finish(self):
+        self.total_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "started": self.started,
+            "total_ms": self.total_ms,
+            "prompt_tokens": sum(s.get("prompt_tokens", 0) for s in self.stages),
+            "completion_tokens": sum(s.get("completion_tokens", 0) for s in self.stages),
+            "llm_calls": sum(1 for s in self.stages if "cache_hit" in s and not s["cache_hit"]),
+            "cache_hits": sum(1 for s in self.stages if s.get("cache_hit")),
+            "tokens_saved": sum(s.get("tokens_saved", 0) for s in self.stages),
+            "cost_usd": round(sum(s.get("cost_usd", 0) for s in self.stages), 6),
+            **self.meta,
+            "stages": self.stages,
+        }
+
+
+class JsonlSink:
+    """Append finished traces to a JSON-lines file (thread-safe)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, trace: Trace):
+        line = json.dumps(trace.to_dict(), ensure_ascii=False, default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+_default_sink = JsonlSink(os.environ["RESUMATCH_TRACE_FILE"]) if os.getenv("RESUMATCH_TRACE_FILE") else None
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def trace_request(name: str, sink: JsonlSink = None, **meta):
+    """Start a trace for the enclosed block; stages inside are recorded into it."""
+    trace = Trace(name, **meta)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        trace.finish()
+        sink = sink or _default_sink
+        if sink is not None:
+            sink.write(trace)
+
+
+@contextmanager
+def collect(name: str):
+    """
+    Record the enclosed block into a trace of its own, written to no sink: for work done
+    ahead of the request (background prefetch), added to it later with `merge`.
+    """
+    trace = Trace(name)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        trace.finish()
+
+
+def merge(other: Trace, **fields):
+    """Add the stages of `other` (see `collect`) to the current trace, tagged with `fields`."""
+    trace = _current.get()
+    if trace is not None:
+        trace.stages.extend({**s, **fields} for s in other.stages)
+
+
+@contextmanager
+def stage(name: str, **fields):
+    """
+    Time the enclosed block as one stage of the current trace.
+    Yields a dict the block may add fields to (tokens, counts...), or None when not tracing.
+    """
+    trace = _current.get()
+    if trace is None:
+        yield None
+        return
+    t0 = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        trace.add(name, (time.perf_counter() - t0) * 1000, **fields)
+
+
+def record(name: str, ms: float, **fields):
+    """Add an already-measured stage to the current trace (no-op when not tracing)."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, ms, **fields)
+
+
+def traced(name: str):
+    """Decorator: record every call of the function as a stage."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with stage(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def token_usage(message) -> Tuple[int, int]:
+    """(prompt_tokens, completion_tokens) from a LangChain AI message, 0s if absent."""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    meta = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    return meta.get("prompt_tokens", 0), meta.get("completion_tokens", 0)
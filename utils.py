@@ -0,0 +1,173 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Generator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket.
+    `rate_per_minute` requests are allowed per minute on average, with bursts
+    of up to `burst` requests (defaults to the per-second share, min 1).
+    Use `acquire` from threads and `aacquire` from coroutines.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst or max(1, int(self.rate))
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _try_take(self) -> float:
+        """Take one token; returns 0 on success, else the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, n: int = 1):
+        """Block until `n` requests may be sent."""
+        for _ in range(n):
+            while True:
+                wait = self._try_take()
+                if not wait:
+                    break
+                time.sleep(wait)
+
+    async def aacquire(self, n: int = 1):
+        """Async version of `acquire` (sleeps without blocking the event loop)."""
+        for _ in range(n):
+            while True:
+                wait = self._try_take()
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+
+
+# -------------------------------
+# Backoff on HTTP 429 (Groq / GitHub)
+# -------------------------------
+def is_rate_limited(exc: BaseException) -> bool:
+    """True for 429-style errors (Groq RateLimitError, httpx / requests 429 responses...)."""
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds from a `Retry-After` header on the error's response, if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, exc: BaseException, base: float = 1.0, max_wait: float = 30.0) -> float:
+    """Retry-After if given, else exponential backoff with full jitter."""
+    hinted = retry_after(exc)
+    if hinted is not None:
+        return min(hinted, max_wait)
+    return random.uniform(0, min(max_wait, base * 2 ** attempt))
+
+
+def with_backoff(fn: Callable[[], T], retries: int = 4, base: float = 1.0, max_wait: float = 30.0,
+                 retry_on: Callable[[BaseException], bool] = is_rate_limited) -> T:
+    """Call `fn`, retrying on rate-limit errors (or whatever `retry_on` accepts)."""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == retries or not retry_on(e):
+                raise
+            delay = backoff_delay(attempt, e, base, max_wait)
+            logging.warning(f"Rate limited, retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+            time.sleep(delay)
+
+
+def batch_with_backoff(call: Callable[[List], List], items: List, retries: int = 4, base: float = 1.0,
+                       max_wait: float = 30.0,
+                       retry_on: Callable[[BaseException], bool] = is_rate_limited) -> List:
+    """
+    Run `call(items)` → one result or exception per item (e.g. Runnable.batch with
+    return_exceptions=True), re-sending only the items that failed with a retryable error.
+    """
+    results = [None] * len(items)
+    pending = list(range(len(items)))
+    for attempt in range(retries + 1):
+        retry, error = [], None
+        for i, res in zip(pending, call([items[i] for i in pending])):
+            if not isinstance(res, Exception):
+                results[i] = res
+            elif attempt < retries and retry_on(res):
+                retry.append(i)
+                error = res
+            else:
+                raise res
+        if not retry:
+            return results
+        delay = backoff_delay(attempt, error, base, max_wait)
+        logging.warning(f"Rate limited on {len(retry)}/{len(items)} calls, retrying them in {delay:.1f}s "
+                        f"({attempt + 1}/{retries})")
+        time.sleep(delay)
+        pending = retry
+
+
+async def awith_backoff(fn: Callable[[], Awaitable[T]], retries: int = 4, base: float = 1.0,
+                        max_wait: float = 30.0,
+                        retry_on: Callable[[BaseException], bool] = is_rate_limited) -> T:
+    """Async version of `with_backoff`; `fn` returns a fresh awaitable per attempt."""
+    for attempt in range(retries + 1):
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt == retries or not retry_on(e):
+                raise
+            delay = backoff_delay(attempt, e, base, max_wait)
+            logging.warning(f"Rate limited, retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+            await asyncio.sleep(delay)
+
+
+# -------------------------------
+# One flow, sync and async drivers
+# -------------------------------
+def drive(flow: Generator, step: Callable[[Any], Any]):
+    """
+    Run a generator-based flow: every request it yields goes to `step`, whose result
+    (or exception) is sent back in; returns what the flow returns. The flow holds the
+    control logic once and `drive` / `adrive` only supply the (sync / async) I/O.
+    """
+    try:
+        request = next(flow)
+        while True:
+            try:
+                response = step(request)
+            except Exception as e:
+                request = flow.throw(e)
+            else:
+                request = flow.send(response)
+    except StopIteration as done:
+        return done.value
+
+
+async def adrive(flow: Generator, step: Callable[[Any], Awaitable]):
+    """Async version of `drive`: `step` returns an awaitable."""
+    try:
+        request = next(flow)
+        while True:
+            try:
+                response = await step(request)
+            except Exception as e:
+                request = flow.throw(e)
+            else:
+                request = flow.send(response)
+    except StopIteration as done:
+        return done.value